@@ -0,0 +1,330 @@
+"""
+Benchmark suite: closed-loop load against both services with local stand-ins
+(synthetic doctor catalog in mongomock, deterministic fake Gemini).
+
+Each endpoint is loaded in turn by --concurrency workers sending a seeded,
+Zipf-skewed workload, and reported as throughput plus p50/p95/p99 latency.
+The services' caches are emptied before each measured run, so results cover
+cold-cache misses (LLM calls, similarity scoring) as well as repeat hits.
+/chat/stream also reports time to first token as measured by the service,
+for streams Gemini generated; answers from the semantic cache are counted
+separately, so cache hits cannot hide a slower streaming path.
+
+Run from the repository root:
+    python -m benchmarks.run                                   # in-process (httpx ASGI transport)
+    python -m benchmarks.run --mode uvicorn                    # each service under uvicorn, over HTTP
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json   # exit 1 on a regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks import stand_ins, workloads
+
+ENDPOINTS = ["/recommend", "/recommend/batch", "/chat", "/chat/stream", "/predict-therapy"]
+SERVICE = {
+    "/recommend": "recommender",
+    "/recommend/batch": "recommender",
+    "/chat": "chatbot",
+    "/chat/stream": "chatbot",
+    "/predict-therapy": "chatbot",
+}
+
+
+def build_workload(endpoint, count, pools, seed):
+    if endpoint == "/recommend":
+        return workloads.recommend_requests(count, pools, seed)
+    if endpoint == "/recommend/batch":
+        return workloads.recommend_batch_requests(max(1, count // 10), pools, seed=seed)
+    if endpoint in ("/chat", "/chat/stream"):
+        return workloads.chat_requests(count, pools, seed, path=endpoint)
+    return workloads.predict_requests(count, pools, seed)
+
+
+def percentiles(values):
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+
+async def send(client, path, body):
+    """
+    One request; returns (ok, server-reported ttft in ms or None). The ttft is
+    None for cached stream answers, which the service sends as a single chunk.
+    """
+    if path == "/chat/stream":
+        response = await client.post(path, json=body)
+        if response.status_code != 200:
+            return False, None
+        done = json.loads(response.text.strip().splitlines()[-1])
+        generated = done.get("chunks", 0) > 1
+        return done.get("type") == "done", done.get("ttft_ms") if generated else None
+    response = await client.post(path, json=body)
+    return response.status_code == 200, None
+
+
+async def closed_loop(client, requests, concurrency):
+    """Send `requests` with `concurrency` workers, each waiting for its reply before the next send."""
+    queue = list(reversed(requests))
+    latencies, ttfts = [], []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            path, body = queue.pop()
+            start = time.perf_counter()
+            try:
+                ok, ttft_ms = await send(client, path, body)
+            except httpx.HTTPError:
+                ok, ttft_ms = False, None
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+            if ttft_ms is not None:
+                ttfts.append(ttft_ms / 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "requests": len(requests),
+        "errors": errors,
+        "throughput_rps": round(len(requests) / elapsed, 2),
+        **percentiles(latencies),
+    }
+    if requests and requests[0][0] == "/chat/stream":
+        result["ttft"] = percentiles(ttfts)
+        result["cached_streams"] = len(requests) - errors - len(ttfts)
+    return result
+
+
+def median_result(runs):
+    """Per-field median of repeated runs of one endpoint; errors are summed."""
+    result = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            result[key] = median_result([run[key] for run in runs])
+        elif key == "errors":
+            result[key] = sum(run[key] for run in runs)
+        elif value is None:
+            result[key] = None
+        else:
+            result[key] = type(value)(np.median([run[key] for run in runs]))
+    return result
+
+
+async def run_endpoints(clients, pools, args):
+    results = {}
+    for endpoint in args.endpoints:
+        client = clients[SERVICE[endpoint]]
+        # The warmup covers imports, pools and first-call paths
+        warmup = build_workload(endpoint, args.warmup, pools, f"{args.seed}:{endpoint}:warmup")
+        await closed_loop(client, warmup, args.concurrency)
+        requests = build_workload(endpoint, args.requests, pools, f"{args.seed}:{endpoint}")
+        runs = []
+        for _ in range(args.repeat):
+            # Every run starts from cold caches: nothing left by the warmup, earlier runs
+            # or earlier endpoints (/chat and /chat/stream share the answer cache)
+            (await client.post("/benchmark/reset")).raise_for_status()
+            runs.append(await closed_loop(client, requests, args.concurrency))
+        results[endpoint] = median_result(runs)
+    return results
+
+
+async def run_inprocess(args, recommender_app, chatbot_app, pools):
+    clients = {
+        "recommender": httpx.AsyncClient(transport=httpx.ASGITransport(app=recommender_app), base_url="http://recommender"),
+        "chatbot": httpx.AsyncClient(transport=httpx.ASGITransport(app=chatbot_app), base_url="http://chatbot"),
+    }
+    try:
+        return await run_endpoints(clients, pools, args)
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(service, port, args):
+    command = [
+        sys.executable, "-m", "benchmarks.serve", service, "--port", str(port),
+        "--catalog-rows", str(args.catalog_rows), "--seed", str(args.seed),
+        "--llm-latency-ms", str(args.llm_latency_ms), "--chunk-ms", str(args.chunk_ms),
+    ]
+    if args.llm_concurrency is not None:
+        command += ["--llm-concurrency", str(args.llm_concurrency)]
+    return subprocess.Popen(command, cwd=stand_ins.ROOT, stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(client, process, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            if (await client.get("/metrics")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready in time")
+
+
+async def run_uvicorn(args):
+    ports = {service: free_port() for service in ("recommender", "chatbot")}
+    processes = {service: start_server(service, port, args) for service, port in ports.items()}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    clients = {
+        service: httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60)
+        for service, port in ports.items()
+    }
+    try:
+        for service in ports:
+            await wait_ready(clients[service], processes[service])
+        # Same catalog and symptom pools the server built from the same seed
+        _, _, pools = stand_ins.synthetic_catalog(args.catalog_rows, args.seed)
+        return await run_endpoints(clients, pools, args)
+    finally:
+        for client in clients.values():
+            await client.aclose()
+        for process in processes.values():
+            process.terminate()
+            process.wait()
+
+
+def config(args):
+    return {
+        "mode": args.mode,
+        "requests": args.requests,
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+        "catalog_rows": args.catalog_rows,
+        "llm_latency_ms": args.llm_latency_ms,
+        "chunk_ms": args.chunk_ms,
+        "llm_concurrency": args.llm_concurrency,
+        "seed": args.seed,
+    }
+
+
+def print_report(results):
+    print(f"{'endpoint':<18} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, r in results.items():
+        print(
+            f"{endpoint:<18} {r['requests']:>8} {r['errors']:>6} {r['throughput_rps']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+        if "ttft" in r and r["ttft"]["p50_ms"] is not None:
+            t = r["ttft"]
+            generated = r["requests"] - r["errors"] - r["cached_streams"]
+            print(
+                f"{'  first token':<18} {generated:>8} {'':>6} {'':>9} "
+                f"{t['p50_ms']:>9.2f} {t['p95_ms']:>9.2f} {t['p99_ms']:>9.2f}   (generated streams only)"
+            )
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Regressions against a saved baseline: p50 or p95 slower, or throughput
+    lower, by more than `tolerance` (a fraction); for /chat/stream, also the
+    p50 or p95 time to first token of generated streams. Latency changes under
+    `min_delta_ms` are ignored as timer noise, as are endpoints the baseline
+    does not cover.
+    """
+    regressions = []
+    for endpoint, current in results.items():
+        if current["errors"]:
+            regressions.append(f"{endpoint}: {current['errors']} failed requests")
+        base = baseline.get(endpoint)
+        if base is None:
+            continue
+        checks = [("", current, base)]
+        if current.get("ttft") and base.get("ttft"):
+            checks.append(("first token ", current["ttft"], base["ttft"]))
+        for label, now, then in checks:
+            for key in ("p50_ms", "p95_ms"):
+                if now[key] is None or then[key] is None:
+                    continue
+                limit = max(then[key] * (1 + tolerance), then[key] + min_delta_ms)
+                if now[key] > limit:
+                    regressions.append(f"{endpoint}: {label}{key} {now[key]:.2f} > {then[key]:.2f} (+{tolerance:.0%})")
+        floor = base["throughput_rps"] * (1 - tolerance)
+        if current["throughput_rps"] < floor:
+            regressions.append(
+                f"{endpoint}: throughput {current['throughput_rps']:.1f} < {base['throughput_rps']:.1f} req/s (-{tolerance:.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--requests", type=int, default=400, help="requests per endpoint (batch: one per 10)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint")
+    parser.add_argument("--repeat", type=int, default=3, help="measured runs per endpoint; the median is reported")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop workers")
+    parser.add_argument("--catalog-rows", type=int, default=5000, help="synthetic doctor catalog size")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="fake Gemini time to first token")
+    parser.add_argument("--chunk-ms", type=float, default=5, help="fake Gemini delay between streamed chunks")
+    parser.add_argument("--llm-concurrency", type=int, default=None, help="chatbot LLM limiter size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to check against; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore latency changes below this")
+    parser.add_argument("--json", action="store_true", help="print results as JSON instead of a table")
+    args = parser.parse_args()
+
+    if args.mode == "inprocess":
+        # Seeding mongomock runs its own event loop, so install before starting the benchmark's
+        recommender_app, pools = stand_ins.install_recommender(args.catalog_rows, args.seed)
+        chatbot_app, _ = stand_ins.install_chatbot(args.llm_latency_ms, args.chunk_ms, args.llm_concurrency)
+        results = asyncio.run(run_inprocess(args, recommender_app, chatbot_app, pools))
+    else:
+        results = asyncio.run(run_uvicorn(args))
+
+    report = {"config": config(args), "python": platform.python_version(), "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(", ".join(f"{k}={v}" for k, v in report["config"].items()))
+        print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {os.path.relpath(args.save_baseline)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["config"] != report["config"]:
+            print(f"warning: baseline was recorded with {baseline['config']}", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {os.path.relpath(args.compare)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Serve one service under uvicorn with the benchmark stand-ins installed.
+
+Run from the repository root (benchmarks.run --mode uvicorn starts these itself):
+    python -m benchmarks.serve recommender --port 8001 [--catalog-rows 5000]
+    python -m benchmarks.serve chatbot --port 8002 [--llm-latency-ms 50 --chunk-ms 5]
+"""
+import argparse
+
+import uvicorn
+
+from benchmarks import stand_ins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("service", choices=["recommender", "chatbot"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--catalog-rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--chunk-ms", type=float, default=5)
+    parser.add_argument("--llm-concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.service == "recommender":
+        app, _ = stand_ins.install_recommender(args.catalog_rows, args.seed)
+    else:
+        app, _ = stand_ins.install_chatbot(args.llm_latency_ms, args.chunk_ms, args.llm_concurrency)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
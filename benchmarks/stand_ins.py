@@ -0,0 +1,120 @@
+"""
+Local stand-ins for the benchmark suite: a synthetic doctor catalog served from
+mongomock, and the deterministic fake Gemini client.
+
+Both services are imported from their own directories, the way they run in
+production; nothing here changes service code, it only swaps module-level
+singletons (registry index, doctor store, LLM client) the same way the tests do.
+Each installed app also gets POST /benchmark/reset, which empties its caches
+so every endpoint is measured from cold caches in either benchmark mode.
+"""
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECOMMENDER_DIR = os.path.join(ROOT, "server", "src", "panchakarma_service")
+CHATBOT_DIR = os.path.join(ROOT, "chatbot-service")
+
+for path in (RECOMMENDER_DIR, CHATBOT_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+# The chatbot must never touch the on-disk prediction cache or the real Gemini API
+os.environ.setdefault("PREDICTION_CACHE_PATH", "")
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+
+def synthetic_catalog(rows, seed=0):
+    """
+    A doctor table of `rows` rows shaped like doctor_data.pkl: each row pairs
+    a therapy with 1-3 symptoms drawn from that therapy's real symptom pool,
+    and a vaidya out of a pool that grows with the catalog.
+    """
+    from app.load_data import load_pickles
+
+    df_doctor, vectorizer = load_pickles()
+    rng = np.random.default_rng(seed)
+
+    pools = {
+        therapy: sorted({s.strip() for text in group["symptoms"].astype(str) for s in text.split(",") if s.strip()})
+        for therapy, group in df_doctor.groupby("panchakarma")
+    }
+    therapies = sorted(pools)
+    vaidyas = [f"Vaidya Synthetic {i:05d}" for i in range(max(40, rows // 50))]
+
+    row_therapies = rng.choice(therapies, size=rows)
+    symptoms = [
+        ", ".join(rng.choice(pools[therapy], size=min(len(pools[therapy]), rng.integers(1, 4)), replace=False))
+        for therapy in row_therapies
+    ]
+    catalog = pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "symptoms": symptoms,
+        "vaidya_name": rng.choice(vaidyas, size=rows),
+        "panchakarma": row_therapies,
+    })
+    return catalog, vectorizer, pools
+
+
+def install_recommender(catalog_rows, seed=0):
+    """
+    Load the recommender app with a synthetic catalog of `catalog_rows` rows
+    and a mongomock users collection holding its vaidyas. Returns
+    (FastAPI app, {therapy: symptom pool}).
+    """
+    from mongomock_motor import AsyncMongoMockClient
+
+    from app import main, recommender
+    from app.doctor_store import DoctorStore
+    from app.registry import registry
+    from app.symptom_index import RecommenderIndex
+
+    catalog, vectorizer, pools = synthetic_catalog(catalog_rows, seed)
+    registry.current = RecommenderIndex.from_frame(catalog, vectorizer, version=f"synthetic-{catalog_rows}-{seed}")
+
+    collection = AsyncMongoMockClient()["SIHProj"]["users"]
+    names = catalog["vaidya_name"].unique().tolist()
+    asyncio.run(collection.insert_many([
+        {
+            "name": name, "role": "doctor", "email": f"vaidya{i}@example.com", "phone": f"+91-90000{i:05d}",
+            "address": {"city": "Pune"}, "profile": {"experience": i % 30},
+        }
+        for i, name in enumerate(names)
+    ]))
+    store = DoctorStore(collection)
+    recommender.doctor_store = store
+    main.doctor_store = store
+
+    def reset():
+        recommender.response_cache.clear()
+        recommender.doctor_store.invalidate()
+        return {"reset": True}
+
+    main.app.add_api_route("/benchmark/reset", reset, methods=["POST"])
+    return main.app, pools
+
+
+def install_chatbot(latency_ms=0.0, chunk_ms=0.0, max_concurrency=None):
+    """Load the chatbot app with the fake Gemini client. Returns (FastAPI app, fake model)."""
+    import llm
+    import main
+    import panchakarma_chatbot
+    import predict_panchakarma
+    from fake_llm import FakeModel
+
+    model = FakeModel(latency=latency_ms / 1000, chunk_latency=chunk_ms / 1000)
+    llm.set_model(model)
+    if max_concurrency is not None:
+        llm.limiter = llm.ConcurrencyLimiter(max_concurrency=max_concurrency, max_queue=max_concurrency * 64)
+
+    def reset():
+        panchakarma_chatbot.answer_cache.clear()
+        predict_panchakarma.prediction_cache.clear()
+        return {"reset": True}
+
+    main.app.add_api_route("/benchmark/reset", reset, methods=["POST"])
+    return main.app, model
@@ -0,0 +1,105 @@
+"""
+Seeded request generators for the benchmark suite.
+
+Traffic is skewed the way intake traffic is: a few complaints account for
+most requests (Zipf over a fixed pool), symptoms arrive in varying order,
+case and separators, and a share of intakes are "sometimes" self-monitor
+cases. Each generator returns a list of (path, JSON body) pairs.
+"""
+import random
+
+SEVERITIES = ["often"] * 5 + ["always"] * 3 + ["sometimes"] * 2
+GENDERS = ["Male", "Female", "Other"]
+
+CHAT_QUESTIONS = [
+    "What is Basti?",
+    "Explain Basti therapy",
+    "What is Vamana and who should take it?",
+    "How does Virechana help with acidity?",
+    "Is Nasya good for sinus problems?",
+    "What is Raktamokshana?",
+    "How long does a Panchakarma course take?",
+    "What should I eat after Virechana?",
+    "Can Panchakarma help with joint pain?",
+    "What are the side effects of Vamana?",
+    "Which therapy balances Vata dosha?",
+    "पंचकर्म क्या है?",
+]
+
+
+def _zipf_choice(rng, items, skew=1.1):
+    weights = [1.0 / (rank + 1) ** skew for rank in range(len(items))]
+    return rng.choices(items, weights=weights)[0]
+
+
+def _complaints(pools, rng, size=200):
+    """A fixed pool of multi-symptom complaints built from the catalog's symptom pools."""
+    all_symptoms = sorted({s for pool in pools.values() for s in pool})
+    complaints = []
+    for _ in range(size):
+        pool = pools[rng.choice(sorted(pools))]
+        picked = rng.sample(pool, min(len(pool), rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            picked.append(rng.choice(all_symptoms))  # a symptom from another therapy
+        complaints.append(picked)
+    return complaints
+
+
+def _spell(symptoms, rng):
+    """One way a client might type a complaint: shuffled, re-cased, "and" or comma separated."""
+    symptoms = list(symptoms)
+    rng.shuffle(symptoms)
+    if rng.random() < 0.2:
+        symptoms = [s.title() for s in symptoms]
+    if len(symptoms) > 1 and rng.random() < 0.4:
+        return ", ".join(symptoms[:-1]) + " and " + symptoms[-1]
+    return ", ".join(symptoms)
+
+
+def recommend_requests(count, pools, seed=0):
+    rng = random.Random(seed)
+    complaints = _complaints(pools, rng)
+    return [
+        ("/recommend", {
+            "age": rng.randint(18, 80),
+            "gender": rng.choice(GENDERS),
+            "symptoms": _spell(_zipf_choice(rng, complaints), rng),
+            "severity": rng.choice(SEVERITIES),
+        })
+        for _ in range(count)
+    ]
+
+
+def recommend_batch_requests(count, pools, batch_size=50, seed=0):
+    singles = recommend_requests(count * batch_size, pools, seed)
+    return [
+        ("/recommend/batch", [body for _, body in singles[i:i + batch_size]])
+        for i in range(0, len(singles), batch_size)
+    ]
+
+
+def chat_requests(count, pools, seed=0, path="/chat"):
+    """Mostly repeated FAQ questions, plus a long tail of one-off symptom questions that reach the LLM."""
+    rng = random.Random(seed)
+    symptoms = sorted({s for pool in pools.values() for s in pool})
+    requests = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            message = f"Which Panchakarma therapy helps with {rng.choice(symptoms)} for {rng.randint(1, 30)} days?"
+        else:
+            message = _zipf_choice(rng, CHAT_QUESTIONS)
+        requests.append((path, {"message": message}))
+    return requests
+
+
+def predict_requests(count, pools, seed=0):
+    rng = random.Random(seed)
+    complaints = _complaints(pools, rng)
+    return [
+        ("/predict-therapy", {
+            "age": rng.randint(18, 80),
+            "gender": rng.choice(GENDERS),
+            "complaint": _spell(_zipf_choice(rng, complaints), rng),
+        })
+        for _ in range(count)
+    ]
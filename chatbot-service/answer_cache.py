@@ -0,0 +1,198 @@
+"""
+Semantic cache of chatbot answers for history-free questions.
+
+Questions are embedded locally as hashed character n-gram vectors of their
+content words ("what is basti" and "explain Basti therapy" both reduce to
+"basti"), and looked up through an inverted index per language. A cached
+answer is served when the cosine similarity reaches the threshold and both
+questions carry the same guard words: numbers, negations, therapy and dosha
+names and polar words ("3 days" vs "30 days", "with" vs "without diabetes",
+Basti vs Vamana in an otherwise identical question, "good" vs "bad for
+sinus") barely move the n-gram vectors of a long question but change the
+answer.
+"""
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))  # entries per language
+
+NGRAM_SIZES = (3, 4, 5)
+FEATURE_BUCKETS = 1 << 20
+
+# Question phrasing that does not change what is being asked
+FILLER_WORDS = frozenset("""
+a an the is are was were be of in on for to and or about what whats which who how why when
+does do did can could would should will please tell me explain describe define give some
+kindly know want i you your my we us it its this that there therapy treatment procedure
+meaning mean means details detail information info
+""".split())
+
+# Words that flip a question's meaning; "t" is what "don't", "isn't" split into
+NEGATION_WORDS = frozenset("not no nor never none without cannot t".split())
+
+# Therapies and doshas a question is about
+DOMAIN_WORDS = frozenset("""
+vamana virechana basti vasti nasya raktamokshana raktamokshan vata pitta kapha
+""".split())
+
+# One side of an antonym pair; "good for" and "bad for" ask opposite questions
+POLAR_WORDS = frozenset("""
+good bad better worse best worst safe harmful dangerous risky beneficial
+before after during benefit benefits risk risks advantages disadvantages
+increase decrease more less high low
+""".split())
+
+# Unicode blocks of the regional languages the assistant answers in
+SCRIPTS = (
+    ("hi", 0x0900, 0x097F),  # Devanagari (Hindi, Marathi)
+    ("bn", 0x0980, 0x09FF),
+    ("pa", 0x0A00, 0x0A7F),
+    ("gu", 0x0A80, 0x0AFF),
+    ("or", 0x0B00, 0x0B7F),
+    ("ta", 0x0B80, 0x0BFF),
+    ("te", 0x0C00, 0x0C7F),
+    ("kn", 0x0C80, 0x0CFF),
+    ("ml", 0x0D00, 0x0D7F),
+)
+
+
+def detect_language(text):
+    """Script-based language key; Latin and anything unrecognised count as "en"."""
+    counts = {}
+    for char in text:
+        code = ord(char)
+        if code < 0x0900:
+            continue
+        for language, low, high in SCRIPTS:
+            if low <= code <= high:
+                counts[language] = counts.get(language, 0) + 1
+                break
+    return max(counts, key=counts.get) if counts else "en"
+
+
+def content_words(text):
+    words = re.findall(r"\w+", text.lower())
+    kept = [word for word in words if word not in FILLER_WORDS]
+    return kept or words
+
+
+def guard_words(text):
+    """Digits, negations, therapy names and polar words of a question, which two questions must share to share an answer."""
+    words = re.findall(r"\w+", text.lower())
+    return frozenset(
+        word for word in words
+        if word.isdigit() or word in NEGATION_WORDS or word in DOMAIN_WORDS or word in POLAR_WORDS
+        or word.startswith(("un", "non"))
+    )
+
+
+def embed(text):
+    """Sparse L2-normalized vector {feature: weight} of hashed character n-grams."""
+    counts = {}
+    for word in content_words(text):
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(max(1, len(padded) - n + 1)):
+                feature = zlib.crc32(padded[i:i + n].encode("utf-8")) % FEATURE_BUCKETS
+                counts[feature] = counts.get(feature, 0) + 1
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return {feature: c / norm for feature, c in counts.items()} if norm else {}
+
+
+class _LanguageIndex:
+    """LRU-bounded entries plus an inverted index from feature to entry ids."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.postings = {}
+
+    def search(self, vector, guard):
+        """Best-scoring entry among those with the same guard words."""
+        scores = {}
+        for feature, weight in vector.items():
+            for entry_id, entry_weight in self.postings.get(feature, {}).items():
+                if self.entries[entry_id][2] == guard:
+                    scores[entry_id] = scores.get(entry_id, 0.0) + weight * entry_weight
+        if not scores:
+            return None, 0.0
+        entry_id = max(scores, key=scores.get)
+        return entry_id, scores[entry_id]
+
+    def add(self, entry_id, vector, guard, answer):
+        self.entries[entry_id] = (vector, answer, guard)
+        for feature, weight in vector.items():
+            self.postings.setdefault(feature, {})[entry_id] = weight
+
+    def evict_oldest(self):
+        entry_id, (vector, _, _) = self.entries.popitem(last=False)
+        for feature in vector:
+            posting = self.postings[feature]
+            del posting[entry_id]
+            if not posting:
+                del self.postings[feature]
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, maxsize=ANSWER_CACHE_SIZE):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._indexes = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "lookup_ms_total": 0.0}
+
+    def get(self, question):
+        """Cached answer to a near-duplicate question, or None."""
+        start = time.perf_counter()
+        vector, guard = embed(question), guard_words(question)
+        with self._lock:
+            index = self._indexes.get(detect_language(question))
+            entry_id, score = index.search(vector, guard) if index and vector else (None, 0.0)
+            hit = entry_id is not None and score >= self.threshold
+            if hit:
+                index.entries.move_to_end(entry_id)
+                answer = index.entries[entry_id][1]
+            self.metrics["hits" if hit else "misses"] += 1
+            self.metrics["lookup_ms_total"] += (time.perf_counter() - start) * 1000
+        return answer if hit else None
+
+    def put(self, question, answer):
+        vector, guard = embed(question), guard_words(question)
+        if not vector:
+            return
+        with self._lock:
+            index = self._indexes.setdefault(detect_language(question), _LanguageIndex())
+            existing, score = index.search(vector, guard)
+            if existing is not None and score >= 1.0 - 1e-9:
+                # Same question again: refresh the answer instead of adding a duplicate
+                index.entries[existing] = (index.entries[existing][0], answer, guard)
+                index.entries.move_to_end(existing)
+                return
+            index.add(self._next_id, vector, guard, answer)
+            self._next_id += 1
+            self.metrics["stores"] += 1
+            while len(index.entries) > self.maxsize:
+                index.evict_oldest()
+                self.metrics["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self):
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            "hits": self.metrics["hits"],
+            "misses": self.metrics["misses"],
+            "stores": self.metrics["stores"],
+            "evictions": self.metrics["evictions"],
+            "hit_rate": round(self.metrics["hits"] / lookups, 4) if lookups else 0.0,
+            "avg_lookup_ms": round(self.metrics["lookup_ms_total"] / lookups, 4) if lookups else 0.0,
+            "entries": {language: len(index.entries) for language, index in self._indexes.items()},
+        }
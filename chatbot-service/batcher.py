@@ -0,0 +1,131 @@
+"""
+Request coalescing for LLM calls.
+
+Concurrent callers submit items; the batcher holds them for at most
+`max_wait` seconds or until `max_batch` items are waiting, runs them as one
+batch call and fans the results back out. Items the batch call did not
+answer, or every item when the batch call fails, are retried one by one.
+
+Each item may carry a deadline covering its whole stay: time spent waiting
+for the batch, the batch call and any single retry all come out of it.
+"""
+import asyncio
+import os
+import sys
+
+PREDICT_BATCH_SIZE = int(os.getenv("PREDICT_BATCH_SIZE", "8"))
+PREDICT_BATCH_WAIT_MS = float(os.getenv("PREDICT_BATCH_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    """
+    `run_batch(items, deadline)` returns one result per item, None for items
+    it could not answer; `run_one(item, deadline)` answers a single item. Both
+    get the remaining budget in seconds (None without deadlines). Exceptions
+    listed in `passthrough` (e.g. llm.Saturated) are raised to the callers
+    as-is; a batch failing with one of `fail_fast` (e.g. a deadline) answers
+    every item with None instead of retrying them one by one.
+    """
+
+    def __init__(self, run_batch, run_one, max_batch=PREDICT_BATCH_SIZE,
+                 max_wait=PREDICT_BATCH_WAIT_MS / 1000, passthrough=(), fail_fast=()):
+        self.run_batch = run_batch
+        self.run_one = run_one
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.passthrough = tuple(passthrough)
+        self.fail_fast = tuple(fail_fast)
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.metrics = {"items": 0, "batches": 0, "batched_items": 0, "batch_failures": 0, "fallback_items": 0}
+
+    async def submit(self, item, deadline=None):
+        """Result for `item`, answered within `deadline` seconds when given."""
+        self.metrics["items"] += 1
+        if self.max_batch <= 1:
+            return await self.run_one(item, deadline)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        due = loop.time() + deadline if deadline is not None else None
+        self._pending.append((item, due, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference so the running batch is not garbage collected
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        items = [item for item, _, _ in batch]
+        dues = [due for _, due, _ in batch]
+
+        def remaining(due):
+            return None if due is None else max(0.0, due - loop.time())
+
+        if len(batch) == 1:
+            results = [None]
+        else:
+            self.metrics["batches"] += 1
+            self.metrics["batched_items"] += len(batch)
+            # The batch answers for everyone in it, so it runs on the tightest budget
+            known = [due for due in dues if due is not None]
+            try:
+                results = list(await self.run_batch(items, remaining(min(known)) if known else None))
+                if len(results) != len(batch):
+                    raise ValueError(f"batch returned {len(results)} results for {len(batch)} items")
+            except self.passthrough as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            except self.fail_fast as e:
+                print(f"Batch of {len(batch)} failed, not retrying items: {e}", file=sys.stderr)
+                self.metrics["batch_failures"] += 1
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                return
+            except Exception as e:
+                print(f"Batch of {len(batch)} failed, retrying items one by one: {e}", file=sys.stderr)
+                self.metrics["batch_failures"] += 1
+                results = [None] * len(batch)
+
+        # Items whose budget is already spent stay None rather than start a call they cannot wait for
+        retry = [i for i, result in enumerate(results) if result is None and remaining(dues[i]) != 0.0]
+        if len(batch) > 1:
+            self.metrics["fallback_items"] += len(retry)
+        retried = await asyncio.gather(
+            *(self.run_one(items[i], remaining(dues[i])) for i in retry), return_exceptions=True
+        )
+        for i, result in zip(retry, retried):
+            results[i] = result
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        batches = self.metrics["batches"]
+        return {
+            **self.metrics,
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_batch_size": round(self.metrics["batched_items"] / batches, 2) if batches else 0.0,
+        }
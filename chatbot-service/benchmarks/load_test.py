@@ -0,0 +1,59 @@
+"""
+Load test: concurrent /chat and /predict-therapy throughput against a local
+stub LLM with fixed latency.
+
+Run from the service directory:
+    python -m benchmarks.load_test [--latency-ms 100] [--requests 64]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("PREDICTION_CACHE_PATH", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import llm  # noqa: E402
+import main  # noqa: E402
+from fake_llm import FakeModel  # noqa: E402
+
+
+async def run(concurrency, total, latency):
+    model = FakeModel(latency=latency)
+    llm.set_model(model)
+    llm.limiter = llm.ConcurrencyLimiter(max_concurrency=concurrency, max_queue=total)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(i):
+            if i % 2:
+                body = {"age": 20 + i % 50, "gender": "Female", "complaint": f"complaint {i}", "bypass_cache": True}
+                return await client.post("/predict-therapy", json=body)
+            return await client.post("/chat", json={"message": f"question {i}"})
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(call(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    return total / elapsed, model.calls
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(f"stub LLM latency {args.latency_ms:.0f} ms, {args.requests} requests")
+    for concurrency in (1, 2, 4, 8, 16, 32):
+        throughput, calls = asyncio.run(run(concurrency, args.requests, latency))
+        print(f"LLM concurrency {concurrency:>3}: {throughput:8.1f} req/s, {calls} LLM calls")
+
+
+if __name__ == "__main__":
+    main_cli()
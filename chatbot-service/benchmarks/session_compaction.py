@@ -0,0 +1,49 @@
+"""
+Prompt size per turn on a long conversation: full client-sent history (last 5
+exchanges, as before) vs. a server-side session compacted to HISTORY_TOKEN_BUDGET.
+
+Run from the service directory:
+    python -m benchmarks.session_compaction [--turns 30]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("PREDICTION_CACHE_PATH", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+import panchakarma_chatbot  # noqa: E402
+from fake_llm import CHAT_REPLY, FakeModel  # noqa: E402
+from sessions import estimate_tokens  # noqa: E402
+
+ANSWER = CHAT_REPLY * 4
+
+
+def legacy_prompt_tokens(history, message):
+    conversation_text = "\n".join(
+        f"User: {msg.get('user', '')}\nAssistant: {msg.get('assistant', '')}" for msg in history[-5:]
+    )
+    prompt = f"{panchakarma_chatbot.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_text}\n\nUser: {message}\nAssistant:"
+    return estimate_tokens(prompt)
+
+
+async def run(turns):
+    llm.set_model(FakeModel(reply=ANSWER))
+    history, conversation_id = [], None
+    print(f"{'turn':>4}  {'full history':>12}  {'session':>8}")
+    for turn in range(1, turns + 1):
+        message = f"Tell me more about point {turn} of the Basti procedure"
+        legacy = legacy_prompt_tokens(history, message)
+        result = await panchakarma_chatbot.chat_session_async(message, conversation_id)
+        conversation_id = result["conversation_id"]
+        history.append({"user": message, "assistant": ANSWER})
+        if turn == 1 or turn % 5 == 0:
+            print(f"{turn:>4}  {legacy:>12}  {result['usage']['prompt_tokens']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=30)
+    asyncio.run(run(parser.parse_args().turns))
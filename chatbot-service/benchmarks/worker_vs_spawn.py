@@ -0,0 +1,101 @@
+"""
+Per-request latency of the stdin/stdout scripts: one process per request (as
+the Node backend spawns them today) vs. one persistent --worker process.
+Also reports the worker's cold start and the cost of importing
+google.generativeai, which the scripts now defer until a Gemini call.
+
+Run from the service directory (Gemini is replaced by the fake backend):
+    python -m benchmarks.worker_vs_spawn [--requests 50] [--script predict_panchakarma.py]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = dict(os.environ, LLM_BACKEND="fake", PREDICTION_CACHE_PATH="")
+
+PAYLOADS = {
+    "predict_panchakarma.py": lambda i: {"age": 30 + i % 40, "gender": "Female", "complaint": f"joint pain {i}"},
+    "panchakarma_chatbot.py": lambda i: {"message": f"What is Basti? ({i})"},
+}
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(label, samples):
+    print(
+        f"{label:<10} p50 {percentile(samples, 0.5):8.1f} ms   p95 {percentile(samples, 0.95):8.1f} ms   "
+        f"mean {statistics.mean(samples):8.1f} ms"
+    )
+
+
+def spawn(script, payloads):
+    samples = []
+    for payload in payloads:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, script], input=json.dumps(payload), capture_output=True,
+            text=True, cwd=SERVICE_DIR, env=ENV, check=True,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def persistent(script, payloads):
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, script, "--worker", "--concurrency", "1"], stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, text=True, cwd=SERVICE_DIR, env=ENV,
+    )
+    ready = json.loads(proc.stdout.readline())
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    samples = []
+    for i, payload in enumerate(payloads):
+        start = time.perf_counter()
+        proc.stdin.write(json.dumps({"id": i, **payload}) + "\n")
+        proc.stdin.flush()
+        response = json.loads(proc.stdout.readline())
+        assert response["id"] == i, response
+        samples.append((time.perf_counter() - start) * 1000)
+    proc.stdin.close()
+    proc.wait()
+    return cold_ms, ready.get("startup_ms"), samples
+
+
+def genai_import_ms():
+    code = "import time; t = time.perf_counter(); import google.generativeai; print((time.perf_counter() - t) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return float(result.stdout) if result.returncode == 0 else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--script", choices=sorted(PAYLOADS), default="predict_panchakarma.py")
+    args = parser.parse_args()
+
+    payloads = [PAYLOADS[args.script](i) for i in range(args.requests)]
+    print(f"{args.script}, {args.requests} sequential requests, fake LLM backend\n")
+
+    report("spawn", spawn(args.script, payloads))
+    cold_ms, startup_ms, samples = persistent(args.script, payloads)
+    report("worker", samples)
+
+    print(f"\nworker cold start: {cold_ms:.1f} ms to ready line ({startup_ms} ms inside the interpreter)")
+    import_ms = genai_import_ms()
+    if import_ms is None:
+        print("google.generativeai: not installed")
+    else:
+        print(f"google.generativeai import: {import_ms:.1f} ms (now deferred to the first Gemini call)")
+
+
+if __name__ == "__main__":
+    main()
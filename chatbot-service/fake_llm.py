@@ -0,0 +1,120 @@
+"""
+Deterministic stand-in for genai.GenerativeModel, used by tests, benchmarks
+and local runs with LLM_BACKEND=fake.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+THERAPIES = ["Vamana", "Virechana", "Basti", "Nasya", "Raktamokshana"]
+
+CHAT_REPLY = (
+    "**Basti** is considered the most important Panchakarma therapy. It balances Vata dosha "
+    "by administering medicated oils or decoctions rectally.\n\n"
+    "It nourishes, cleanses and rejuvenates the colon, and is used for arthritis, "
+    "constipation, neurological disorders and anxiety."
+)
+
+
+def _pick_therapy(text):
+    digest = hashlib.sha1(text.encode("utf-8")).digest()
+    return THERAPIES[digest[0] % len(THERAPIES)]
+
+
+def default_reply(prompt):
+    """
+    A therapy name for classification prompts, a JSON object of therapies for
+    batch classification prompts, a canned answer otherwise.
+    """
+    if "Respond with ONLY the therapy name" in prompt:
+        return _pick_therapy(prompt)
+    if "Respond with ONLY a JSON object" in prompt:
+        patients = re.findall(r"^(\d+)\. (\{.*\})$", prompt, re.MULTILINE)
+        return json.dumps({index: _pick_therapy(line) for index, line in patients})
+    return CHAT_REPLY
+
+
+class FakeAPIError(Exception):
+    """An API error carrying its HTTP status as `code`, like google.api_core's."""
+
+    def __init__(self, code, message=""):
+        super().__init__(f"{code} {message}".strip())
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """Async iterator over word chunks of a reply, one every `chunk_latency` seconds."""
+
+    def __init__(self, model, text, chunk_latency):
+        self.model = model
+        self.words = text.split(" ")
+        self.chunk_latency = chunk_latency
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        sent = 0
+        try:
+            for i, word in enumerate(self.words):
+                await asyncio.sleep(self.chunk_latency)
+                yield FakeResponse(word if i == 0 else " " + word)
+                sent += 1
+        finally:
+            if sent < len(self.words):
+                self.model.cancelled += 1
+
+
+class FakeModel:
+    """
+    Answers with `reply` (a string or a prompt -> string function) after
+    `latency` seconds. Raises `error` instead when it is set. With stream=True
+    the reply is produced word by word, `chunk_latency` seconds apart.
+    """
+
+    def __init__(self, reply=default_reply, latency=0.0, error=None, chunk_latency=0.0):
+        self.reply = reply
+        self.latency = latency
+        self.error = error
+        self.chunk_latency = chunk_latency
+        self.calls = 0
+        self.cancelled = 0
+        self.prompts = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")) / 1000,
+            chunk_latency=float(os.getenv("FAKE_LLM_CHUNK_MS", "0")) / 1000,
+        )
+
+    def _answer(self, prompt):
+        self.calls += 1
+        self.prompts.append(prompt)
+        if self.error is not None:
+            raise self.error
+        text = self.reply(prompt) if callable(self.reply) else self.reply
+        return FakeResponse(text)
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"no reply within {timeout:.3g}s")
+        time.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        await asyncio.sleep(self.latency)
+        response = self._answer(prompt)
+        if stream:
+            return FakeStream(self, response.text, self.chunk_latency)
+        return response
@@ -0,0 +1,106 @@
+"""
+Nearest-centroid therapy classifier over the recommender's TF-IDF space.
+
+The model file holds the TF-IDF vocabulary and IDF weights of the Panchakarma
+service's vectorizer.pkl plus one L2-normalized centroid per therapy, built
+from doctor_data.pkl by scripts/build_local_classifier.py. Prediction is pure
+Python and takes microseconds, so it can answer confident cases before any
+LLM call.
+"""
+import json
+import math
+import os
+import re
+
+LOCAL_MODEL_PATH = os.getenv(
+    "LOCAL_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "therapy_centroids.json"),
+)
+
+# Softmax temperature applied to the centroid similarities to get a confidence
+CONFIDENCE_TEMPERATURE = 0.1
+
+# Filler words that say nothing about the complaint; every other word the
+# vocabulary does not know lowers the confidence
+STOP_WORDS = frozenset("""
+    a about after all also am an and any are as at be been before being but by can did do does
+    during each few for from get got had has have having he her him his how however if in into
+    is it its me more most my of on or our over she since so some such than that the their them
+    then there these they this those through to too up very was we were what when where which
+    while who why will with you your
+    day days week weeks month months year years time times
+    feel feeling felt suffer suffering suffered complain complaining patient
+    lot lots much many little bit bad mild slight
+""".split())
+
+
+class LocalTherapyClassifier:
+    def __init__(self, vocabulary, idf, labels, centroids, token_pattern=r"(?u)\b\w\w+\b", lowercase=True):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.labels = labels
+        self.centroids = centroids
+        self.lowercase = lowercase
+        self._token_re = re.compile(token_pattern)
+
+    @classmethod
+    def load(cls, path=LOCAL_MODEL_PATH):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, model):
+        centroids = [{int(col): weight for col, weight in centroid.items()} for centroid in model["centroids"]]
+        return cls(
+            model["vocabulary"], model["idf"], model["labels"], centroids,
+            token_pattern=model.get("token_pattern", r"(?u)\b\w\w+\b"),
+            lowercase=model.get("lowercase", True),
+        )
+
+    def vectorize(self, text):
+        """Sparse L2-normalized TF-IDF vector {column: weight}, as TfidfVectorizer would give."""
+        if self.lowercase:
+            text = text.lower()
+        counts = {}
+        for token in self._token_re.findall(text):
+            col = self.vocabulary.get(token)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        vector = {col: count * self.idf[col] for col, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {col: w / norm for col, w in vector.items()} if norm else {}
+
+    def scores(self, text):
+        vector = self.vectorize(text)
+        return [sum(w * centroid.get(col, 0.0) for col, w in vector.items()) for centroid in self.centroids]
+
+    def coverage(self, text):
+        """Share of the complaint's content words that are in the vocabulary."""
+        if self.lowercase:
+            text = text.lower()
+        words = [t for t in self._token_re.findall(text) if t not in STOP_WORDS and not t.isdigit()]
+        if not words:
+            return 0.0
+        return sum(t in self.vocabulary for t in words) / len(words)
+
+    def predict(self, text):
+        """
+        Return (therapy, confidence). Confidence is the softmax probability of
+        the best centroid scaled by coverage(), so a complaint that is mostly
+        words the model has never seen ("chest pain radiating to left arm")
+        escalates however one-sided its few known terms are; a complaint with
+        no known terms gets 0.
+        """
+        scores = self.scores(text)
+        if not any(scores):
+            return None, 0.0
+        best = max(range(len(scores)), key=scores.__getitem__)
+        exps = [math.exp((s - scores[best]) / CONFIDENCE_TEMPERATURE) for s in scores]
+        return self.labels[best], self.coverage(text) / sum(exps)
+
+
+def load_local_classifier(path=LOCAL_MODEL_PATH):
+    """The local classifier, or None when no model file has been built."""
+    if not path or not os.path.exists(path):
+        return None
+    return LocalTherapyClassifier.load(path)
@@ -1,9 +1,18 @@
-from fastapi import FastAPI
+import json
+import logging
+import time
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from panchakarma_chatbot import chat_panchakarma
-from predict_panchakarma import predict_panchakarma
+import llm
+import metrics
+import panchakarma_chatbot
+import predict_panchakarma
+from panchakarma_chatbot import chat_session_async, stream_chat_panchakarma
+from predict_panchakarma import predict_panchakarma_async
 
 # ---------------------------------------------------------
 # FASTAPI APP INITIALIZATION
@@ -14,6 +23,7 @@ app = FastAPI(
     description="Gemini-powered Panchakarma Chatbot & Therapy Predictor",
     version="1.0.0"
 )
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------
 # CORS (IMPORTANT for connecting React & Node.js)
@@ -27,22 +37,137 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------------------------------------------------
+# METRICS & PROFILING
+# ---------------------------------------------------------
+
+def _cache_lookups():
+    prediction = predict_panchakarma.prediction_cache.stats()
+    answer = panchakarma_chatbot.answer_cache.stats()
+    return {
+        ("prediction", "hit"): prediction["memory_hits"] + prediction["disk_hits"],
+        ("prediction", "miss"): prediction["misses"],
+        ("answer", "hit"): answer["hits"],
+        ("answer", "miss"): answer["misses"],
+    }
+
+
+metrics.enable()
+metrics.from_function(
+    "counter", "chatbot_cache_lookups_total", "Cache lookups by cache and result", _cache_lookups, ["cache", "result"],
+)
+metrics.from_function(
+    "gauge", "chatbot_llm_calls_in_flight", "Gemini calls holding a concurrency slot",
+    lambda: {(): llm.limiter.in_flight},
+)
+metrics.from_function(
+    "gauge", "chatbot_llm_calls_waiting", "Gemini calls queued for a concurrency slot",
+    lambda: {(): llm.limiter.waiting},
+)
+metrics.from_function(
+    "counter", "chatbot_llm_rejected_total", "Gemini calls rejected because the queue was full",
+    lambda: {(): llm.limiter.rejected},
+)
+metrics.from_function(
+    "counter", "chatbot_llm_calls_total", "Gemini calls by outcome (success, error, timeout, rejected)",
+    lambda: {(outcome,): s["count"] for outcome, s in llm.resilience.latency.stats().items()}, ["outcome"],
+)
+metrics.from_function(
+    "gauge", "chatbot_llm_breaker_state", "1 for the circuit breaker's current state",
+    lambda: {(state,): int(llm.resilience.breaker.state == state) for state in ("closed", "half_open", "open")},
+    ["state"],
+)
+metrics.from_function(
+    "counter", "chatbot_predict_batched_items_total", "Therapy predictions sent to Gemini as part of a micro-batch",
+    lambda: {(): predict_panchakarma.classify_batcher.metrics["batched_items"]},
+)
+
+
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+def saturated_error(e):
+    # Every LLM slot and queue position is taken: ask the caller to back off
+    return HTTPException(status_code=503, detail=f"LLM capacity exhausted: {e}", headers={"Retry-After": "1"})
+
+
 # ---------------------------------------------------------
 # CHATBOT ENDPOINT
 # ---------------------------------------------------------
 
 class ChatRequest(BaseModel):
     message: str
-    history: list | None = None
+    history: list | None = None  # only seeds a new conversation
+    conversation_id: str | None = None
 
 
 @app.post("/chat", tags=["Chatbot"])
 async def chatbot_endpoint(req: ChatRequest):
     """
     Panchakarma Chatbot using Gemini
+
+    History is kept server-side: send back the returned conversation_id
+    instead of the full history. `usage` reports prompt token counts.
     """
-    response = chat_panchakarma(req.message, req.history)
-    return {"reply": response}
+    try:
+        return await chat_session_async(req.message, req.conversation_id, req.history)
+    except llm.Saturated as e:
+        raise saturated_error(e)
+
+
+@app.post("/chat/stream", tags=["Chatbot"])
+async def chatbot_stream_endpoint(req: ChatRequest, request: Request):
+    """
+    Panchakarma Chatbot streamed as NDJSON while Gemini generates:
+    {"type": "token", "text": ...} lines, then one {"type": "done", ...}
+    line with the conversation_id to send next time, time-to-first-token
+    and total time in milliseconds.
+    """
+    start = time.perf_counter()
+    session = panchakarma_chatbot.session_store.get(req.conversation_id, seed_history=req.history)
+    chunks = stream_chat_panchakarma(req.message, session=session)
+
+    # Wait for the first chunk so a saturated worker can still answer 503
+    try:
+        first = await anext(chunks, None)
+    except llm.Saturated as e:
+        raise saturated_error(e)
+    ttft_ms = (time.perf_counter() - start) * 1000
+
+    async def ndjson_lines():
+        count = 0
+        try:
+            text = first
+            while text is not None:
+                count += 1
+                yield json.dumps({"type": "token", "text": text}) + "\n"
+                if await request.is_disconnected():
+                    logger.info("Client left /chat/stream after %d chunks", count)
+                    return
+                text = await anext(chunks, None)
+
+            total_ms = (time.perf_counter() - start) * 1000
+            logger.info("Streamed %d chunks, ttft %.1f ms, total %.1f ms", count, ttft_ms, total_ms)
+            yield json.dumps({
+                "type": "done",
+                "conversation_id": session.id,
+                "chunks": count,
+                "ttft_ms": round(ttft_ms, 2),
+                "total_ms": round(total_ms, 2),
+            }) + "\n"
+        finally:
+            # Runs on completion, disconnect or cancellation: stop paying for the generation
+            await chunks.aclose()
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@app.get("/chat/cache", tags=["Chatbot"])
+async def chat_cache_stats():
+    """
+    Hit rate, lookup latency and size of the semantic answer cache
+    """
+    return panchakarma_chatbot.answer_cache.stats()
 
 
 # ---------------------------------------------------------
@@ -53,6 +178,7 @@ class TherapyRequest(BaseModel):
     age: int
     gender: str
     complaint: str
+    bypass_cache: bool = False
 
 
 @app.post("/predict-therapy", tags=["Therapy Prediction"])
@@ -60,11 +186,15 @@ async def therapy_predictor(req: TherapyRequest):
     """
     Predict the correct Panchakarma therapy using Gemini
     """
-    therapy, doctors = predict_panchakarma(
-        req.age,
-        req.gender,
-        req.complaint
-    )
+    try:
+        therapy, doctors = await predict_panchakarma_async(
+            req.age,
+            req.gender,
+            req.complaint,
+            bypass_cache=req.bypass_cache
+        )
+    except llm.Saturated as e:
+        raise saturated_error(e)
 
     return {
         "therapy": therapy,
@@ -72,6 +202,42 @@ async def therapy_predictor(req: TherapyRequest):
     }
 
 
+@app.get("/predict-therapy/cache", tags=["Therapy Prediction"])
+async def therapy_cache_stats():
+    """
+    Hit/miss metrics of the therapy prediction cache
+    """
+    return predict_panchakarma.prediction_cache.stats()
+
+
+@app.get("/predict-therapy/batching", tags=["Therapy Prediction"])
+async def therapy_batching_stats():
+    """
+    Batch sizes and per-item fallbacks of the LLM request coalescer
+    """
+    return predict_panchakarma.classify_batcher.stats()
+
+
+# ---------------------------------------------------------
+# LLM HEALTH
+# ---------------------------------------------------------
+
+@app.get("/llm/status", tags=["Health Check"])
+async def llm_status():
+    """
+    Circuit breaker state, per-outcome Gemini latency and limiter occupancy
+    """
+    return {**llm.resilience.stats(), "limiter": llm.limiter.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health Check"])
+async def prometheus_metrics():
+    """
+    Stage timings, request latency, cache hits and in-flight gauges in Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # ---------------------------------------------------------
 # ROOT TEST ENDPOINT
 # ---------------------------------------------------------
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Configuration
+PREDICTION_CACHE_PATH = os.getenv(
+    "PREDICTION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "prediction_cache.sqlite3"),
+)
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", str(7 * 24 * 3600)))
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "1024"))
+
+# Upper bounds (exclusive) of the age buckets used in cache keys
+AGE_BUCKETS = (13, 18, 30, 45, 60)
+
+GENDERS = {"m": "male", "male": "male", "man": "male", "f": "female", "female": "female", "woman": "female"}
+
+
+def age_bucket(age):
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return "unknown"
+    lower = 0
+    for upper in AGE_BUCKETS:
+        if age < upper:
+            return f"{lower}-{upper - 1}"
+        lower = upper
+    return f"{lower}+"
+
+
+def canonical_complaint(complaint):
+    """Lowercase, strip punctuation and sort the comma/"and" separated parts."""
+    text = re.sub(r"[^\w,]+", " ", str(complaint).lower())
+    parts = re.split(r",|\band\b", text)
+    parts = {" ".join(part.split()) for part in parts}
+    return ", ".join(sorted(part for part in parts if part))
+
+
+def cache_key(age, gender, complaint):
+    gender = str(gender).strip().lower()
+    return "|".join((age_bucket(age), GENDERS.get(gender, gender or "unknown"), canonical_complaint(complaint)))
+
+
+class SQLiteStore:
+    """Persistent key -> therapy store with per-row expiry."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, therapy TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT therapy, expires_at FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM predictions WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row
+
+    def put(self, key, therapy, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions (key, therapy, expires_at) VALUES (?, ?, ?)",
+                (key, therapy, expires_at),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.commit()
+
+
+class PredictionCache:
+    """
+    Two-tier cache of therapy predictions: an in-memory LRU in front of a
+    SQLite store. Only therapies from `valid_therapies` are ever stored.
+    """
+
+    def __init__(self, valid_therapies, path=PREDICTION_CACHE_PATH, maxsize=PREDICTION_CACHE_SIZE,
+                 ttl=PREDICTION_CACHE_TTL, clock=time.time):
+        self.valid_therapies = frozenset(valid_therapies)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.store = SQLiteStore(path) if path else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "rejected": 0}
+
+    def _remember(self, key, therapy, expires_at):
+        self._memory[key] = (therapy, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.metrics["memory_hits"] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+            return None
+
+    def _got_from_store(self, key, entry):
+        with self._lock:
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            self._remember(key, *entry)
+            self.metrics["disk_hits"] += 1
+            return entry[0]
+
+    def get(self, age, gender, complaint):
+        key = cache_key(age, gender, complaint)
+        now = self.clock()
+        therapy = self._get_memory(key, now)
+        if therapy is not None:
+            return therapy
+        return self._got_from_store(key, self.store.get(key, now) if self.store else None)
+
+    async def get_async(self, age, gender, complaint):
+        """get() for the event loop: a memory miss reads SQLite in a worker thread."""
+        key = cache_key(age, gender, complaint)
+        now = self.clock()
+        therapy = self._get_memory(key, now)
+        if therapy is not None:
+            return therapy
+        entry = await asyncio.to_thread(self.store.get, key, now) if self.store else None
+        return self._got_from_store(key, entry)
+
+    def _put_memory(self, age, gender, complaint, therapy):
+        """The (key, expires_at) to persist, or None when the therapy is rejected."""
+        if therapy not in self.valid_therapies:
+            self.metrics["rejected"] += 1
+            return None
+        key = cache_key(age, gender, complaint)
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._remember(key, therapy, expires_at)
+            self.metrics["writes"] += 1
+        return key, expires_at
+
+    def put(self, age, gender, complaint, therapy):
+        """Store a validated therapy; anything else (e.g. a fallback) is rejected."""
+        stored = self._put_memory(age, gender, complaint, therapy)
+        if stored and self.store:
+            self.store.put(stored[0], therapy, stored[1])
+        return stored is not None
+
+    async def put_async(self, age, gender, complaint, therapy):
+        """put() for the event loop: the SQLite commit runs in a worker thread."""
+        stored = self._put_memory(age, gender, complaint, therapy)
+        if stored and self.store:
+            await asyncio.to_thread(self.store.put, stored[0], therapy, stored[1])
+        return stored is not None
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.store:
+            self.store.clear()
+
+    def stats(self):
+        lookups = self.metrics["memory_hits"] + self.metrics["disk_hits"] + self.metrics["misses"]
+        hits = lookups - self.metrics["misses"]
+        return {
+            **self.metrics,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
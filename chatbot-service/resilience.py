@@ -0,0 +1,317 @@
+"""
+Deadlines, retries, hedging and a circuit breaker for upstream LLM calls.
+
+Every call gets a total time budget. Failed or timed-out attempts are retried
+with jittered exponential backoff while budget remains. Only transient
+errors (timeouts, connection trouble, HTTP 429 and 5xx) are retried and count
+towards the breaker; anything else, such as a safety-blocked reply, is
+deterministic and is raised at once. Optionally, a second
+"hedged" attempt starts when the first one is slower than `hedge_after`, and
+whichever finishes first wins. After `failure_threshold` consecutive failed
+calls the breaker opens and calls fail immediately with CircuitOpen, so the
+callers' local fallbacks answer without waiting. After `reset_timeout` one
+trial call is let through: success closes the breaker, failure re-opens it.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+LLM_DEADLINE_MS = float(os.getenv("LLM_DEADLINE_MS", "10000"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+LLM_BACKOFF_MS = float(os.getenv("LLM_BACKOFF_MS", "200"))
+LLM_HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0"))  # 0 disables hedging
+LLM_STREAM_IDLE_MS = float(os.getenv("LLM_STREAM_IDLE_MS", "5000"))  # longest gap between streamed chunks
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_S = float(os.getenv("BREAKER_RESET_S", "30"))
+
+# Latency samples kept per outcome for the percentiles in stats()
+LATENCY_WINDOW = 1000
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the upstream while the breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call used up its time budget without an answer."""
+
+
+def is_transient(error):
+    """
+    Whether retrying may help: timeouts, connection errors, and API errors with
+    HTTP status 429 or 5xx (google.api_core errors carry it as `code`).
+    """
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError, DeadlineExceeded)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_S, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go upstream now; counts the rejection when not."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._trial_in_flight):
+                self._trial_in_flight = self.state == HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def release(self):
+        """End a call that says nothing about upstream health (e.g. rejected locally)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.opened_at + self.reset_timeout - self.clock()), 3)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_s": self.reset_timeout,
+                "retry_in_s": retry_in,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class LatencyRecorder:
+    """Count and recent latency percentiles per call outcome."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome, seconds):
+        with self._lock:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            self._samples.setdefault(outcome, deque(maxlen=self.window)).append(seconds * 1000)
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for outcome, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[outcome] = {
+                    "count": self._counts[outcome],
+                    "p50_ms": round(ordered[len(ordered) // 2], 2),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                    "max_ms": round(ordered[-1], 2),
+                }
+            return result
+
+
+class ResilientCaller:
+    """
+    Runs upstream calls under a deadline with retries, optional hedging and a
+    circuit breaker (streams use `deadline` to the first chunk and
+    `stream_idle` between chunks). Exceptions in `passthrough` (e.g. local overload) are
+    re-raised at once and say nothing about upstream health; neither do
+    errors `transient` rejects, which are re-raised without a retry.
+    """
+
+    def __init__(self, deadline=LLM_DEADLINE_MS / 1000, retries=LLM_RETRIES, backoff=LLM_BACKOFF_MS / 1000,
+                 hedge_after=LLM_HEDGE_AFTER_MS / 1000, breaker=None, passthrough=(), transient=is_transient,
+                 stream_idle=LLM_STREAM_IDLE_MS / 1000):
+        self.deadline = deadline
+        self.stream_idle = stream_idle
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after or None
+        self.breaker = breaker or CircuitBreaker()
+        self.passthrough = tuple(passthrough)
+        self.transient = transient
+        self.latency = LatencyRecorder()
+        self.metrics = {"attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0}
+
+    def _backoff_delay(self, attempt, remaining):
+        # "Full jitter": anywhere up to the exponential step, never past the deadline
+        return min(remaining, random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _finish(self, outcome, start):
+        self.latency.record(outcome, time.perf_counter() - start)
+        if outcome == "success":
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _fail_permanently(self, error, start):
+        """A deterministic error: reported to the caller, but the upstream itself is fine."""
+        self.latency.record("error", time.perf_counter() - start)
+        self.breaker.release()
+        raise error
+
+    async def call(self, make_call, deadline=None):
+        """
+        Await `make_call()` (a zero-argument coroutine function) within the
+        budget. Raises CircuitOpen, DeadlineExceeded or the last upstream error.
+        """
+        start = time.perf_counter()
+        if not self.breaker.allow():
+            self.latency.record("rejected", 0.0)
+            raise CircuitOpen("LLM circuit breaker is open")
+
+        deadline = self.deadline if deadline is None else deadline
+        budget_end = start + deadline
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = budget_end - time.perf_counter()
+            if remaining <= 0:
+                break
+            if attempt:
+                self.metrics["retries"] += 1
+            budget = asyncio.timeout(remaining)
+            try:
+                async with budget:
+                    result = await self._attempt(make_call)
+            except (asyncio.CancelledError, *self.passthrough):
+                self.breaker.release()
+                raise
+            except Exception as e:
+                # Only our own budget running out is the deadline; an upstream
+                # TimeoutError (the same class since 3.11) is a transient failure
+                if isinstance(e, TimeoutError) and budget.expired():
+                    last_error = DeadlineExceeded(f"no LLM answer within {deadline:.3g}s")
+                    break
+                if not self.transient(e):
+                    self._fail_permanently(e, start)
+                last_error = e
+                remaining = budget_end - time.perf_counter()
+                if attempt < self.retries and remaining > 0:
+                    await asyncio.sleep(self._backoff_delay(attempt, remaining))
+                continue
+            self._finish("success", start)
+            return result
+
+        if last_error is None:
+            last_error = DeadlineExceeded(f"no LLM answer within {deadline:.3g}s")
+        self._finish("timeout" if isinstance(last_error, DeadlineExceeded) else "error", start)
+        raise last_error
+
+    async def _attempt(self, make_call):
+        self.metrics["attempts"] += 1
+        if self.hedge_after is None:
+            return await make_call()
+
+        primary = asyncio.ensure_future(make_call())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                return primary.result()
+
+            self.metrics["hedges"] += 1
+            self.metrics["attempts"] += 1
+            hedge = asyncio.ensure_future(make_call())
+            tasks.add(hedge)
+            pending, first_error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.metrics["hedge_wins"] += 1
+                        return task.result()
+                    # Prefer the primary's error over e.g. the hedge being rejected locally
+                    if first_error is None or task is primary:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            # The loser, or both on deadline cancellation, must not keep running upstream
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def call_sync(self, make_call, deadline=None):
+        """
+        Blocking variant for the stdin/stdout entry points, without hedging.
+        `make_call(timeout)` must itself give up after `timeout` seconds.
+        """
+        start = time.perf_counter()
+        if not self.breaker.allow():
+            self.latency.record("rejected", 0.0)
+            raise CircuitOpen("LLM circuit breaker is open")
+
+        deadline = self.deadline if deadline is None else deadline
+        budget_end = start + deadline
+        last_error = None
+        for attempt in range(self.retries + 1):
+            remaining = budget_end - time.perf_counter()
+            if remaining <= 0:
+                break
+            if attempt:
+                self.metrics["retries"] += 1
+            self.metrics["attempts"] += 1
+            try:
+                result = make_call(remaining)
+            except self.passthrough:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not self.transient(e):
+                    self._fail_permanently(e, start)
+                last_error = e
+                remaining = budget_end - time.perf_counter()
+                if attempt < self.retries and remaining > 0:
+                    time.sleep(self._backoff_delay(attempt, remaining))
+                continue
+            self._finish("success", start)
+            return result
+
+        if last_error is None:
+            last_error = DeadlineExceeded(f"no LLM answer within {deadline:.3g}s")
+        # The client's own timeout error surfaces as whatever it raises; the clock says which it was
+        timed_out = isinstance(last_error, DeadlineExceeded) or time.perf_counter() >= budget_end
+        self._finish("timeout" if timed_out else "error", start)
+        raise last_error
+
+    def stats(self):
+        return {
+            "breaker": self.breaker.stats(),
+            "latency": self.latency.stats(),
+            "deadline_s": self.deadline,
+            "stream_idle_s": self.stream_idle,
+            "retries": self.retries,
+            "hedge_after_s": self.hedge_after,
+            **self.metrics,
+        }
@@ -0,0 +1,74 @@
+"""
+Build models/therapy_centroids.json for local_classifier from the Panchakarma
+service's pickles (needs pandas and scikit-learn, only at build time).
+
+    python scripts/build_local_classifier.py [--data-dir ../server/src/panchakarma_service]
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from local_classifier import LOCAL_MODEL_PATH  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(SERVICE_DIR, "..", "server", "src", "panchakarma_service")
+
+
+def load_data(data_dir):
+    with open(os.path.join(data_dir, "doctor_data.pkl"), "rb") as f:
+        df_doctor = pickle.load(f)
+    with open(os.path.join(data_dir, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+    return df_doctor, vectorizer
+
+
+def build(data_dir):
+    return build_model(*load_data(data_dir))
+
+
+def build_model(df_doctor, vectorizer):
+    params = vectorizer.get_params()
+    if params["ngram_range"] != (1, 1) or params["analyzer"] != "word" or params["sublinear_tf"]:
+        raise ValueError("local_classifier only reproduces plain unigram TF-IDF vectorizers")
+
+    matrix = normalize(vectorizer.transform(df_doctor["symptoms"].astype(str)))
+    labels = sorted(df_doctor["panchakarma"].unique())
+    centroids = []
+    for label in labels:
+        rows = np.flatnonzero(df_doctor["panchakarma"].to_numpy() == label)
+        centroid = normalize(np.asarray(matrix[rows].mean(axis=0)))[0]
+        centroids.append({str(col): float(centroid[col]) for col in np.flatnonzero(centroid)})
+
+    return {
+        "vocabulary": {term: int(col) for term, col in vectorizer.vocabulary_.items()},
+        "idf": [float(w) for w in vectorizer.idf_],
+        "token_pattern": params["token_pattern"],
+        "lowercase": params["lowercase"],
+        "labels": labels,
+        "centroids": centroids,
+        "trained_rows": int(len(df_doctor)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local therapy classifier")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--out", default=LOCAL_MODEL_PATH)
+    args = parser.parse_args()
+
+    model = build(args.data_dir)
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(model, f, indent=1)
+    print(f"Wrote {args.out}: {len(model['labels'])} therapies, {len(model['vocabulary'])} terms")
+
+
+if __name__ == "__main__":
+    main()
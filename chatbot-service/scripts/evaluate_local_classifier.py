@@ -0,0 +1,107 @@
+"""
+Offline evaluation of the tiered therapy predictor.
+
+Replays complaints through the local classifier and compares it with a
+reference. By default the classifier is rebuilt from a seeded training split
+of doctor_data.pkl and scored against the labels of the held-out rows, so the
+numbers are not a measure of fit to the rows the centroids came from. With
+--complaints FILE (one free-text complaint per line) the reference is the
+configured LLM (LLM_BACKEND=fake works for dry runs), which is the closer
+estimate of what production traffic escalates. Reports agreement, escalation
+rate and local latency for a range of confidence thresholds.
+
+    python scripts/evaluate_local_classifier.py [--data-dir ...] [--holdout 0.2] [--seed 0] [--limit N]
+    python scripts/evaluate_local_classifier.py --complaints scripts/free_text_complaints.txt
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from build_local_classifier import build_model, load_data  # noqa: E402
+from local_classifier import LocalTherapyClassifier, load_local_classifier  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(SERVICE_DIR, "..", "server", "src", "panchakarma_service")
+THRESHOLDS = (0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+
+
+def holdout_cases(data_dir, holdout, seed, limit):
+    """(classifier trained on the other rows, [(complaint, label)] of the held-out rows)."""
+    df_doctor, vectorizer = load_data(data_dir)
+    rows = list(range(len(df_doctor)))
+    random.Random(seed).shuffle(rows)
+    cut = int(len(rows) * holdout)
+    test, train = sorted(rows[:cut]), sorted(rows[cut:])
+    classifier = LocalTherapyClassifier.from_dict(build_model(df_doctor.iloc[train], vectorizer))
+    held_out = df_doctor.iloc[test]
+    cases = list(zip(held_out["symptoms"].astype(str), held_out["panchakarma"]))
+    return classifier, cases[:limit] if limit else cases
+
+
+def load_complaints(path, limit):
+    with open(path) as f:
+        complaints = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return complaints[:limit] if limit else complaints
+
+
+def llm_reference(complaints):
+    import predict_panchakarma
+
+    return [(complaint, predict_panchakarma._classify(35, "Other", complaint)) for complaint in complaints]
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local therapy classifier")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--complaints", help="free-text complaints, one per line; compared with the LLM")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of doctor_data.pkl held out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.complaints:
+        classifier = load_local_classifier()
+        if classifier is None:
+            sys.exit("No local model found; run scripts/build_local_classifier.py first")
+        cases = llm_reference(load_complaints(args.complaints, args.limit))
+        reference = "llm"
+    else:
+        classifier, cases = holdout_cases(args.data_dir, args.holdout, args.seed, args.limit)
+        reference = f"labels of {len(cases)} held-out rows"
+
+    predictions, latencies_us = [], []
+    for complaint, _ in cases:
+        start = time.perf_counter()
+        predictions.append(classifier.predict(complaint))
+        latencies_us.append((time.perf_counter() - start) * 1e6)
+
+    print(f"{len(cases)} complaints, reference: {reference}")
+    print(
+        f"local latency: p50 {percentile(latencies_us, 0.5):.1f} us, p95 {percentile(latencies_us, 0.95):.1f} us, "
+        f"p99 {percentile(latencies_us, 0.99):.1f} us, max {max(latencies_us):.1f} us"
+    )
+    overall = sum(p == ref for (p, _), (_, ref) in zip(predictions, cases)) / len(cases)
+    print(f"agreement without escalation: {overall:.1%}")
+    print(f"{'threshold':>9}  {'escalated':>9}  {'local agreement':>15}  {'end-to-end':>10}")
+
+    for threshold in THRESHOLDS:
+        local = [(p, ref) for (p, c), (_, ref) in zip(predictions, cases) if p is not None and c >= threshold]
+        escalation = 1 - len(local) / len(cases)
+        local_agreement = statistics.mean(p == ref for p, ref in local) if local else float("nan")
+        # Escalated cases are answered by the reference itself, so they always agree
+        end_to_end = (sum(p == ref for p, ref in local) + len(cases) - len(local)) / len(cases)
+        print(f"{threshold:>9.2f}  {escalation:>9.1%}  {local_agreement:>15.1%}  {end_to_end:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
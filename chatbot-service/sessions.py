@@ -0,0 +1,160 @@
+"""
+Server-side conversation sessions with token-budgeted history compaction.
+
+Recent turns are kept verbatim while they fit the budget; older turns are
+folded into a rolling summary of one short line per turn, and the oldest
+summary lines are dropped once the summary outgrows its share. Prompt size
+therefore stays bounded however long a conversation runs.
+"""
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "800"))
+MAX_HISTORY_TURNS = int(os.getenv("MAX_HISTORY_TURNS", "5"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+MAX_PENDING_SESSIONS = int(os.getenv("MAX_PENDING_SESSIONS", "1000"))
+
+# Share of the budget verbatim turns may use; the rest is left for the summary
+VERBATIM_SHARE = 0.75
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def format_turn(turn):
+    return f"User: {turn.get('user', '')}\nAssistant: {turn.get('assistant', '')}"
+
+
+def _truncate_words(text, limit):
+    words = re.sub(r"[*_#`]+", "", str(text)).split()
+    return " ".join(words[:limit]) + (" ..." if len(words) > limit else "")
+
+
+def summarize_turn(turn):
+    """One-line extractive summary: the question and the answer's first sentence."""
+    answer = re.split(r"(?<=[.!?।])\s", str(turn.get("assistant", "")).strip(), maxsplit=1)[0]
+    return f"- User asked: {_truncate_words(turn.get('user', ''), 20)} | Assistant: {_truncate_words(answer, 30)}"
+
+
+def compact(turns, summary, budget=HISTORY_TOKEN_BUDGET, max_turns=MAX_HISTORY_TURNS):
+    """
+    Split turns into a verbatim window and a rolling summary that together
+    fit in `budget` estimated tokens. Returns (window, summary_lines).
+    """
+    window, used = [], 0
+    for turn in reversed(turns):
+        cost = estimate_tokens(format_turn(turn))
+        if len(window) >= max_turns or used + cost > budget * VERBATIM_SHARE:
+            break
+        window.append(turn)
+        used += cost
+    window.reverse()
+
+    summary = list(summary) + [summarize_turn(turn) for turn in turns[:len(turns) - len(window)]]
+    summary_tokens = sum(estimate_tokens(line) for line in summary)
+    while summary and summary_tokens > budget - used:
+        summary_tokens -= estimate_tokens(summary.pop(0))
+    return window, summary
+
+
+class ConversationSession:
+    def __init__(self, conversation_id):
+        self.id = conversation_id
+        self.turns = []
+        self.summary = []
+        self.total_turns = 0
+        self.touched_at = time.time()
+
+    def record(self, user_message, reply, budget=HISTORY_TOKEN_BUDGET):
+        self.turns, self.summary = compact(
+            self.turns + [{"user": user_message, "assistant": reply}], self.summary, budget
+        )
+        self.total_turns += 1
+
+    @property
+    def is_empty(self):
+        return not self.turns and not self.summary
+
+
+class SessionStore:
+    """
+    In-memory sessions keyed by conversation id, LRU-bounded with an idle TTL.
+
+    A session whose id the client has not sent back yet waits in a smaller
+    pending tier, so one-shot callers that never continue a conversation
+    cannot evict the conversations that do.
+    """
+
+    def __init__(self, ttl=SESSION_TTL, maxsize=MAX_SESSIONS, pending_maxsize=MAX_PENDING_SESSIONS, clock=time.time):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.pending_maxsize = pending_maxsize
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pop_live(self, sessions, conversation_id, now):
+        session = sessions.pop(conversation_id, None)
+        if session is not None and session.touched_at + self.ttl <= now:
+            return None
+        return session
+
+    def get(self, conversation_id=None, seed_history=None):
+        """
+        The live session for conversation_id, or a new unsaved one (seeded
+        with any client-sent history) when the id is unknown, expired or
+        missing. Sending back a pending session's id makes it live.
+        """
+        now = self.clock()
+        with self._lock:
+            session = None
+            if conversation_id:
+                session = self._pop_live(self._sessions, conversation_id, now)
+                if session is None:
+                    session = self._pop_live(self._pending, conversation_id, now)
+            if session is not None:
+                session.touched_at = now
+                self._sessions[session.id] = session
+                while len(self._sessions) > self.maxsize:
+                    self._sessions.popitem(last=False)
+                return session
+
+        session = ConversationSession(conversation_id or uuid.uuid4().hex)
+        if seed_history:
+            session.turns, session.summary = compact(list(seed_history), [])
+            session.total_turns = len(seed_history)
+        session.touched_at = now
+        return session
+
+    def save(self, session):
+        """Keep a session after a completed turn; a new one stays pending until its id comes back."""
+        with self._lock:
+            session.touched_at = self.clock()
+            if session.id in self._sessions:
+                self._sessions.move_to_end(session.id)
+                return
+            self._pending[session.id] = session
+            self._pending.move_to_end(session.id)
+            while len(self._pending) > self.pending_maxsize:
+                self._pending.popitem(last=False)
+
+    def drop(self, conversation_id):
+        with self._lock:
+            live = self._sessions.pop(conversation_id, None) is not None
+            return self._pending.pop(conversation_id, None) is not None or live
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+# Tests never touch the on-disk prediction cache
+os.environ.setdefault("PREDICTION_CACHE_PATH", "")
+
+# Make the service modules importable when pytest runs from any directory
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+
+@pytest.fixture(autouse=True)
+def fresh_answer_cache(monkeypatch):
+    """Each test starts with an empty semantic answer cache."""
+    import panchakarma_chatbot
+    from answer_cache import SemanticAnswerCache
+
+    cache = SemanticAnswerCache()
+    monkeypatch.setattr(panchakarma_chatbot, "answer_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """
+    A FakeModel serving every LLM call, with no local classifier and an empty
+    in-memory prediction cache, so predictions reach the model.
+    """
+    import llm
+    import predict_panchakarma
+    from fake_llm import FakeModel
+    from prediction_cache import PredictionCache
+
+    model = FakeModel()
+    monkeypatch.setattr(llm, "_model", model)
+    monkeypatch.setattr(predict_panchakarma, "local_classifier", None)
+    monkeypatch.setattr(predict_panchakarma, "prediction_cache", PredictionCache(predict_panchakarma.VALID_THERAPIES, path=None))
+    return model
+
+
+@pytest.fixture(autouse=True)
+def fresh_resilience(monkeypatch):
+    """Each test starts with a closed breaker and no backoff between retries."""
+    import llm
+    from resilience import ResilientCaller
+
+    caller = ResilientCaller(backoff=0, passthrough=(llm.Saturated,))
+    monkeypatch.setattr(llm, "resilience", caller)
+    return caller
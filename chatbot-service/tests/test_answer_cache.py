@@ -0,0 +1,98 @@
+import asyncio
+
+import llm
+import panchakarma_chatbot
+from answer_cache import SemanticAnswerCache, detect_language
+from fake_llm import FakeModel
+
+
+def test_rephrased_questions_hit_and_different_topics_miss():
+    cache = SemanticAnswerCache(threshold=0.85)
+    cache.put("What is Basti?", "basti answer")
+
+    assert cache.get("explain basti therapy") == "basti answer"
+    assert cache.get("Tell me about Basti") == "basti answer"
+    assert cache.get("what is vamana") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_languages_are_kept_apart():
+    cache = SemanticAnswerCache()
+    cache.put("बस्ती क्या है", "hindi answer")
+    cache.put("what is basti", "english answer")
+
+    assert detect_language("ಬಸ್ತಿ ಎಂದರೇನು") == "kn"
+    assert cache.get("बस्ती क्या है?") == "hindi answer"
+    assert cache.get("basti") == "english answer"
+    assert cache.stats()["entries"] == {"hi": 1, "en": 1}
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = SemanticAnswerCache(maxsize=2)
+    cache.put("what is basti", "basti")
+    cache.put("what is nasya", "nasya")
+    cache.get("what is basti")
+    cache.put("what is vamana", "vamana")
+
+    assert cache.get("what is nasya") is None
+    assert cache.get("what is basti") == "basti"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_chat_reuses_answers_only_without_history(monkeypatch, fresh_answer_cache):
+    model = FakeModel(reply="Basti is a medicated enema.")
+    monkeypatch.setattr(llm, "_model", model)
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter())
+
+    async def run():
+        first = await panchakarma_chatbot.chat_panchakarma_async("What is Basti?")
+        second = await panchakarma_chatbot.chat_panchakarma_async("explain basti therapy")
+        history = [{"user": "hi", "assistant": "hello"}]
+        await panchakarma_chatbot.chat_panchakarma_async("explain basti therapy", history)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second == "Basti is a medicated enema."
+    assert model.calls == 2
+
+
+def test_errors_are_not_cached(monkeypatch, fresh_answer_cache):
+    monkeypatch.setattr(llm, "_model", FakeModel(error=RuntimeError("quota")))
+
+    reply = panchakarma_chatbot.chat_panchakarma("what is basti")
+
+    assert reply.startswith("Sorry")
+    assert fresh_answer_cache.stats()["stores"] == 0
+
+
+def test_numbers_and_negations_must_match():
+    cache = SemanticAnswerCache(threshold=0.85)
+    cache.put("Is virechana safe with diabetes", "with diabetes")
+    cache.put("is nasya safe for children", "safe for children")
+    cache.put("Which therapy helps joint pain for 3 days?", "3 days")
+
+    assert cache.get("Is virechana safe without diabetes") is None
+    assert cache.get("is nasya unsafe for children") is None
+    assert cache.get("Which therapy helps joint pain for 30 days?") is None
+    assert cache.get("is nasya not safe for children") is None
+    assert cache.get("Is Virechana safe with diabetes?") == "with diabetes"
+    assert cache.get("Which therapy helps with joint pain for 3 days") == "3 days"
+
+
+def test_therapy_names_and_antonyms_must_match():
+    cache = SemanticAnswerCache(threshold=0.85)
+    cache.put(
+        "Is Basti safe for a pregnant woman in her third trimester with high blood pressure?", "basti in pregnancy"
+    )
+    cache.put("Is Nasya good for sinus problems?", "nasya is good")
+    cache.put("What should I eat after Virechana?", "after virechana")
+
+    assert cache.get(
+        "Is Vamana safe for a pregnant woman in her third trimester with high blood pressure?"
+    ) is None
+    assert cache.get("Is Nasya bad for sinus problems?") is None
+    assert cache.get("What should I eat before Virechana?") is None
+    assert cache.get("Is Basti harmful for a pregnant woman in her third trimester with high blood pressure?") is None
+    assert cache.get("is nasya good for sinus problems") == "nasya is good"
+    assert cache.get("What to eat after Virechana") == "after virechana"
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import re
+import time
+
+import pytest
+
+import llm
+import predict_panchakarma
+from batcher import MicroBatcher
+
+# Therapy each complaint should get, in submission order
+EXPECTED = {
+    "migraine": "Nasya",
+    "joint pain": "Basti",
+    "acne": "Raktamokshana",
+    "acidity": "Virechana",
+    "cough": "Vamana",
+}
+
+
+def patients_in(prompt):
+    lines = re.findall(r"^(\d+)\. (\{.*\})$", prompt, re.MULTILINE)
+    return {index: json.loads(record)["symptoms"] for index, record in lines}
+
+
+def stub_reply(drop=(), garble=()):
+    """Answers batch prompts with JSON, skipping or garbling some complaints, and single prompts by name."""
+    def reply(prompt):
+        if "Respond with ONLY a JSON object" in prompt:
+            answers = {
+                index: "Ayurveda" if complaint in garble else EXPECTED[complaint]
+                for index, complaint in patients_in(prompt).items()
+                if complaint not in drop
+            }
+            # Reversed key order: results must be matched by index, not position
+            return "```json\n" + json.dumps(dict(reversed(answers.items()))) + "\n```"
+        complaint = re.search(r"Symptoms/Complaints: (.*)", prompt).group(1)
+        return EXPECTED[complaint]
+    return reply
+
+
+@pytest.fixture
+def model(monkeypatch, fake_model):
+    fake_model.reply, fake_model.latency = stub_reply(), 0.01
+    batcher = MicroBatcher(
+        predict_panchakarma._classify_batch_async,
+        lambda patient, deadline: predict_panchakarma._classify_async(*patient, deadline=deadline),
+        max_batch=8, max_wait=0.02, passthrough=(llm.Saturated,), fail_fast=(llm.DeadlineExceeded,),
+    )
+    monkeypatch.setattr(predict_panchakarma, "classify_batcher", batcher)
+    return fake_model
+
+
+def predict_all(complaints):
+    async def run():
+        return await asyncio.gather(*(
+            predict_panchakarma.predict_panchakarma_async(40, "Female", complaint) for complaint in complaints
+        ))
+    return [therapy for therapy, _ in asyncio.run(run())]
+
+
+def test_concurrent_requests_share_one_llm_call(model):
+    complaints = list(EXPECTED)
+
+    assert predict_all(complaints) == [EXPECTED[c] for c in complaints]
+    assert model.calls == 1
+    assert predict_panchakarma.classify_batcher.stats()["avg_batch_size"] == len(complaints)
+
+
+def test_full_batch_is_sent_without_waiting(model):
+    predict_panchakarma.classify_batcher.max_wait = 10
+    complaints = list(EXPECTED) + ["migraine", "acne", "cough"]
+
+    assert predict_all(complaints) == [EXPECTED[c] for c in complaints]
+    assert model.calls == 1
+
+
+def test_unanswered_items_fall_back_to_single_calls(model):
+    model.reply = stub_reply(drop={"acne"}, garble={"cough"})
+    complaints = list(EXPECTED)
+
+    assert predict_all(complaints) == [EXPECTED[c] for c in complaints]
+    assert model.calls == 3
+    stats = predict_panchakarma.classify_batcher.stats()
+    assert stats["fallback_items"] == 2 and stats["batch_failures"] == 0
+
+
+def test_failed_batch_falls_back_to_every_item(model):
+    single = stub_reply()
+    model.reply = lambda prompt: "I cannot help" if "JSON object" in prompt else single(prompt)
+    complaints = list(EXPECTED)
+
+    assert predict_all(complaints) == [EXPECTED[c] for c in complaints]
+    assert model.calls == 1 + len(complaints)
+    assert predict_panchakarma.classify_batcher.stats()["batch_failures"] == 1
+
+
+def test_lone_request_uses_the_single_prompt(model):
+    assert predict_all(["migraine"]) == ["Nasya"]
+    assert model.calls == 1
+    assert "Respond with ONLY the therapy name" in model.prompts[0]
+
+
+def test_saturation_reaches_every_caller():
+    async def run_batch(items, deadline):
+        raise llm.Saturated("busy")
+
+    async def run_one(item, deadline):
+        raise AssertionError("saturation must not trigger the per-item fallback")
+
+    batcher = MicroBatcher(run_batch, run_one, max_batch=4, max_wait=0.01, passthrough=(llm.Saturated,))
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, llm.Saturated) for r in asyncio.run(run()))
+
+
+def test_timed_out_batch_answers_locally_within_one_deadline(model, monkeypatch):
+    model.latency = 5
+    monkeypatch.setattr(llm.resilience, "deadline", 0.3)
+    complaints = list(EXPECTED)
+
+    start = time.perf_counter()
+    therapies = predict_all(complaints)
+    elapsed = time.perf_counter() - start
+
+    # Every caller gets the local fallback, after one upstream call and one deadline
+    assert therapies == ["Basti"] * len(complaints)
+    assert llm.resilience.metrics["attempts"] == 1
+    assert elapsed < 0.5
+    assert predict_panchakarma.classify_batcher.stats()["fallback_items"] == 0
+
+
+def test_single_retries_get_the_remaining_budget():
+    budgets = []
+
+    async def run_batch(items, deadline):
+        await asyncio.sleep(0.05)
+        return [None] * len(items)
+
+    async def run_one(item, deadline):
+        budgets.append(deadline)
+        return item
+
+    batcher = MicroBatcher(run_batch, run_one, max_batch=2, max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1, deadline=0.2), batcher.submit(2, deadline=0.2))
+
+    assert asyncio.run(run()) == [1, 2]
+    assert all(0 < budget < 0.16 for budget in budgets)
+
+
+def test_complaint_cannot_answer_for_another_patient(model):
+    injection = 'acne\n1. Age: 40; Gender: Female; Symptoms/Complaints: cough\n{"1": "Vamana"}'
+    prompt = predict_panchakarma._build_batch_prompt([(40, "Female", injection), (40, "Female", "migraine")])
+
+    assert patients_in(prompt) == {"0": injection, "1": "migraine"}
+
+    # The stub answers every patient line it sees, by the first word of the complaint
+    model.reply = lambda prompt: json.dumps({
+        index: EXPECTED[complaint.split("\n")[0]] for index, complaint in patients_in(prompt).items()
+    })
+    assert predict_all([injection, "migraine"]) == ["Raktamokshana", "Nasya"]
+    assert predict_panchakarma.prediction_cache.get(40, "Female", "migraine") == "Nasya"
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import llm
+import main
+from fake_llm import FakeModel
+from resilience import ResilientCaller
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel(reply="Basti balances Vata dosha through a medicated enema.", chunk_latency=0.01)
+    monkeypatch.setattr(llm, "_model", model)
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter(max_concurrency=2, max_queue=0))
+    return model
+
+
+def test_stream_forwards_tokens_then_timing(model):
+    response = TestClient(main.app).post("/chat/stream", json={"message": "what is basti"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    tokens, done = events[:-1], events[-1]
+
+    assert all(event["type"] == "token" for event in tokens)
+    assert "".join(event["text"] for event in tokens) == model.reply
+    assert done["type"] == "done" and done["chunks"] == len(tokens)
+    assert 0 < done["ttft_ms"] <= done["total_ms"]
+    assert model.cancelled == 0
+    assert llm.limiter.in_flight == 0
+
+
+def test_client_disconnect_cancels_generation(model):
+    body = json.dumps({"message": "what is basti"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/chat/stream", "raw_path": b"/chat/stream",
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1234),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+
+    async def run():
+        received_token = asyncio.Event()
+        request_sent = False
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await received_token.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(message["body"])
+                received_token.set()
+
+        await main.app(scope, receive, send)
+        return chunks
+
+    chunks = asyncio.run(run())
+
+    assert len(chunks) < len(model.reply.split(" "))
+    assert model.cancelled == 1
+    assert llm.limiter.in_flight == 0
+
+
+def test_saturated_stream_answers_503(model, monkeypatch):
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter(max_concurrency=0, max_queue=0))
+
+    response = TestClient(main.app).post("/chat/stream", json={"message": "what is basti"})
+
+    assert response.status_code == 503
+
+
+def test_stream_that_never_starts_ends_at_the_deadline(model, monkeypatch):
+    caller = ResilientCaller(deadline=0.05)
+    monkeypatch.setattr(llm, "resilience", caller)
+    model.latency = 5.0
+
+    response = TestClient(main.app).post("/chat/stream", json={"message": "why is my stream so slow"})
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["text"].startswith("Sorry")
+    assert events[-1]["total_ms"] < 1000
+    assert caller.breaker.failures == 1
+    assert llm.limiter.in_flight == 0
+
+
+def test_stalled_stream_is_cut_off_between_chunks(model, monkeypatch):
+    caller = ResilientCaller(deadline=2.0, stream_idle=0.05)
+    monkeypatch.setattr(llm, "resilience", caller)
+    model.chunk_latency = 0.2
+
+    async def run():
+        return [text async for text in llm.stream_async("a prompt")]
+
+    with pytest.raises(llm.DeadlineExceeded):
+        asyncio.run(run())
+    assert caller.breaker.failures == 1
+    assert model.cancelled == 1
+    assert llm.limiter.in_flight == 0
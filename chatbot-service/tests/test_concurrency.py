@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import llm
+import main
+import predict_panchakarma
+
+
+@pytest.fixture
+def slow_model(monkeypatch, fake_model):
+    fake_model.latency = 0.2
+    # One LLM call per request, so the limiter sees every request
+    monkeypatch.setattr(predict_panchakarma.classify_batcher, "max_batch", 1)
+    return fake_model
+
+
+async def post_all(requests):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post(url, json=body) for url, body in requests))
+
+
+def test_slow_llm_calls_do_not_block_each_other(monkeypatch, slow_model):
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter(max_concurrency=8, max_queue=8))
+
+    start = time.perf_counter()
+    responses = asyncio.run(post_all([("/chat", {"message": f"question {i}"}) for i in range(8)]))
+    elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    assert slow_model.calls == 8
+    assert elapsed < 0.2 * 8 / 2
+
+
+def test_saturated_worker_answers_503(monkeypatch, slow_model):
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter(max_concurrency=1, max_queue=1))
+    body = {"age": 40, "gender": "Male", "complaint": "joint pain", "bypass_cache": True}
+
+    responses = asyncio.run(post_all([("/predict-therapy", body)] * 4))
+
+    assert sorted(r.status_code for r in responses) == [200, 200, 503, 503]
+    rejected = next(r for r in responses if r.status_code == 503)
+    assert rejected.headers["retry-after"] == "1"
+    assert llm.limiter.stats()["rejected"] == 2
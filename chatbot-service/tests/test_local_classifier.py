@@ -0,0 +1,82 @@
+import os
+import pickle
+
+import pytest
+
+import predict_panchakarma
+from local_classifier import LocalTherapyClassifier, load_local_classifier
+
+classifier = load_local_classifier()
+
+
+@pytest.fixture
+def model(monkeypatch, fake_model):
+    fake_model.reply = "Virechana"
+    monkeypatch.setattr(predict_panchakarma, "local_classifier", classifier)
+    return fake_model
+
+
+def test_vectorize_matches_sklearn_transform():
+    pytest.importorskip("sklearn")
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "server", "src", "panchakarma_service", "vectorizer.pkl")
+    with open(path, "rb") as f:
+        vectorizer = pickle.load(f)
+
+    for text in ["Joint pain and joint inflammation", "migraine, stuffy nose", "the fever"]:
+        expected = vectorizer.transform([text])
+        vector = classifier.vectorize(text)
+        assert sorted(vector) == sorted(expected.indices.tolist())
+        assert all(abs(vector[col] - expected[0, col]) < 1e-12 for col in vector)
+
+
+def test_confident_complaint_skips_llm(model):
+    therapy, doctors = predict_panchakarma.predict_panchakarma(40, "Male", "joint pain")
+
+    assert therapy == "Basti" and doctors
+    assert model.calls == 0
+
+
+def test_low_confidence_escalates_to_llm(model, monkeypatch):
+    assert classifier.predict("fever")[1] == 0.0
+
+    therapy, _ = predict_panchakarma.predict_panchakarma(40, "Male", "fever")
+
+    assert therapy == "Virechana"
+    assert model.calls == 1
+
+
+def test_threshold_above_one_always_escalates(model, monkeypatch):
+    monkeypatch.setattr(predict_panchakarma, "LOCAL_CONFIDENCE_THRESHOLD", 1.01)
+
+    predict_panchakarma.predict_panchakarma(40, "Male", "joint pain")
+
+    assert model.calls == 1
+
+
+def test_predict_returns_known_label():
+    therapy, confidence = classifier.predict("migraine, headache")
+
+    assert therapy == "Nasya"
+    assert 0.2 <= confidence <= 1.0
+    assert isinstance(classifier, LocalTherapyClassifier)
+
+
+@pytest.mark.parametrize("complaint", [
+    "severe chest pain radiating to left arm",
+    "I have cancer and pain",
+    "sudden loss of vision, headache",
+])
+def test_complaint_outside_the_vocabulary_escalates(model, complaint):
+    therapy, confidence = classifier.predict(complaint)
+    assert therapy is not None
+    assert confidence < predict_panchakarma.LOCAL_CONFIDENCE_THRESHOLD
+
+    therapy, _ = predict_panchakarma.predict_panchakarma(40, "Male", complaint)
+
+    assert therapy == "Virechana"
+    assert model.calls == 1
+
+
+def test_filler_words_do_not_lower_confidence():
+    assert classifier.coverage("joint pain and inflammation for 3 days") == 1.0
+    assert classifier.coverage("joint pain in my left knee") == 0.5
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(fake_model):
+    fake_model.reply = "Nasya"
+    return TestClient(main.app)
+
+
+def stages(header):
+    return {entry.split(";")[0] for entry in header.split(", ")}
+
+
+def test_profile_header_returns_stage_breakdown(client):
+    body = {"age": 40, "gender": "Female", "complaint": "migraine"}
+
+    first = client.post("/predict-therapy", json=body, headers={"X-Profile": "1"})
+    assert {"prediction_cache", "llm_classify", "llm_queue", "llm_call", "doctor_lookup", "total"} <= stages(
+        first.headers["server-timing"]
+    )
+
+    second = client.post("/predict-therapy", json=body, headers={"X-Profile": "1"})
+    assert "llm_call" not in stages(second.headers["server-timing"])
+
+    chat = client.post("/chat", json={"message": "What is Nasya?"}, headers={"X-Profile": "1"})
+    assert {"prompt_build", "answer_cache", "llm_call"} <= stages(chat.headers["server-timing"])
+
+
+def test_metrics_endpoint_exports_prometheus_text(client):
+    client.post("/chat", json={"message": "What is Nasya?"})
+    client.post("/chat", json={"message": "What is Nasya?"})
+
+    text = client.get("/metrics").text
+    assert 'chatbot_stage_seconds_count{stage="llm_call"}' in text
+    assert 'chatbot_cache_lookups_total{cache="answer",result="hit"} 1' in text
+    assert 'chatbot_llm_breaker_state{state="closed"} 1' in text
+    assert "chatbot_llm_calls_in_flight 0" in text
+    assert 'chatbot_http_requests_in_flight{path="/chat"} 0' in text
+
+
+def test_request_metrics_are_labelled_by_route(client):
+    client.get("/wp-login.php")
+    client.get("/.env?scan=1")
+    client.get("/chat")  # known path, wrong method
+
+    text = client.get("/metrics").text
+    assert 'path="other"' in text
+    assert "wp-login" not in text and ".env" not in text
+    assert 'chatbot_http_request_seconds_count{method="GET",path="/chat",status="405"} 1' in text
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+
+import llm
+import predict_panchakarma
+from fake_llm import FakeModel
+from prediction_cache import PredictionCache, cache_key
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel(reply="Nasya.")
+    monkeypatch.setattr(llm, "_model", model)
+    return model
+
+
+@pytest.fixture
+def stub_gemini(monkeypatch, tmp_path, model):
+    monkeypatch.setattr(predict_panchakarma, "local_classifier", None)
+    cache = PredictionCache(predict_panchakarma.VALID_THERAPIES, path=str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(predict_panchakarma, "prediction_cache", cache)
+    return cache
+
+
+def test_cache_key_normalizes_inputs():
+    assert cache_key(34, "Male", "Migraine and joint pain.") == cache_key("31", " m ", "joint  pain, migraine")
+    assert cache_key(34, "Male", "migraine") != cache_key(64, "Male", "migraine")
+
+
+def test_repeated_complaint_is_served_from_cache(stub_gemini, model):
+    first = predict_panchakarma.predict_panchakarma(40, "Female", "Migraine")
+    second = predict_panchakarma.predict_panchakarma(42, "female", "migraine.")
+
+    assert first[0] == second[0] == "Nasya"
+    assert model.calls == 1
+    assert stub_gemini.stats()["memory_hits"] == 1
+
+
+def test_bypass_skips_lookup(stub_gemini, model):
+    predict_panchakarma.predict_panchakarma(40, "Female", "migraine")
+    predict_panchakarma.predict_panchakarma(40, "Female", "migraine", bypass_cache=True)
+
+    assert model.calls == 2
+
+
+@pytest.mark.parametrize("reply", ["I am not sure", RuntimeError("quota exceeded")])
+def test_fallback_is_never_cached(stub_gemini, model, reply):
+    if isinstance(reply, Exception):
+        model.error = reply
+    else:
+        model.reply = reply
+
+    therapy, doctors = predict_panchakarma.predict_panchakarma(40, "Female", "joint pain")
+
+    assert therapy == "Basti" and doctors
+    assert stub_gemini.get(40, "Female", "joint pain") is None
+    assert stub_gemini.stats()["writes"] == 0
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    now = [1000.0]
+    path = str(tmp_path / "cache.sqlite3")
+    PredictionCache(["Vamana"], path=path, ttl=60, clock=lambda: now[0]).put(30, "Male", "cough", "Vamana")
+
+    restarted = PredictionCache(["Vamana"], path=path, ttl=60, clock=lambda: now[0])
+    assert restarted.get(30, "Male", "cough") == "Vamana"
+    assert restarted.stats()["disk_hits"] == 1
+
+    now[0] += 61
+    assert PredictionCache(["Vamana"], path=path, clock=lambda: now[0]).get(30, "Male", "cough") is None
+
+
+def test_invalid_therapy_is_rejected(tmp_path):
+    cache = PredictionCache(["Vamana"], path=None)
+
+    assert cache.put(30, "Male", "cough", "Basti") is False
+    assert cache.stats()["rejected"] == 1
+
+
+def test_async_path_keeps_sqlite_off_the_event_loop(stub_gemini, model, monkeypatch):
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter())
+    store_threads = []
+    for name in ("get", "put"):
+        method = getattr(stub_gemini.store, name)
+
+        def recorded(*args, _method=method):
+            store_threads.append(threading.get_ident())
+            return _method(*args)
+
+        monkeypatch.setattr(stub_gemini.store, name, recorded)
+
+    async def run():
+        first = await predict_panchakarma.predict_panchakarma_async(40, "Female", "migraine")
+        stub_gemini._memory.clear()
+        second = await predict_panchakarma.predict_panchakarma_async(40, "Female", "migraine")
+        return threading.get_ident(), first, second
+
+    loop_thread, first, second = asyncio.run(run())
+
+    assert first[0] == second[0] == "Nasya"
+    assert model.calls == 1
+    assert stub_gemini.stats()["disk_hits"] == 1
+    assert len(store_threads) == 3 and loop_thread not in store_threads
@@ -0,0 +1,198 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import llm
+import main
+import panchakarma_chatbot
+import predict_panchakarma
+from fake_llm import FakeAPIError
+from local_classifier import LocalTherapyClassifier
+from resilience import CircuitBreaker, ResilientCaller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def model(monkeypatch, fake_model):
+    fake_model.reply = "Nasya"
+    monkeypatch.setattr(predict_panchakarma.classify_batcher, "max_batch", 1)
+    # A tiny local model that knows "joint pain" is Basti
+    classifier = LocalTherapyClassifier({"joint": 0, "pain": 1}, [1.0, 1.0], ["Basti", "Nasya"], [{0: 0.7, 1: 0.7}, {}])
+    monkeypatch.setattr(predict_panchakarma, "local_classifier", classifier)
+    monkeypatch.setattr(predict_panchakarma, "LOCAL_CONFIDENCE_THRESHOLD", 1.01)
+    return fake_model
+
+
+def use_caller(monkeypatch, **kwargs):
+    caller = ResilientCaller(backoff=0, passthrough=(llm.Saturated,), **kwargs)
+    monkeypatch.setattr(llm, "resilience", caller)
+    return caller
+
+
+def test_slow_upstream_is_cut_off_at_the_deadline(monkeypatch, model):
+    caller = use_caller(monkeypatch, deadline=0.05)
+    model.latency = 1.0
+
+    start = time.perf_counter()
+    therapy, _ = asyncio.run(predict_panchakarma.predict_panchakarma_async(40, "Male", "joint pain"))
+    reply = asyncio.run(panchakarma_chatbot.chat_panchakarma_async("What is Nasya?"))
+
+    assert time.perf_counter() - start < 0.5
+    assert therapy == "Basti"  # local best guess, not the LLM's Nasya
+    assert reply.startswith("Sorry")
+    assert caller.stats()["latency"]["timeout"]["count"] == 2
+
+
+def test_failed_attempts_are_retried_within_the_budget(monkeypatch, model):
+    caller = use_caller(monkeypatch, retries=2)
+    failures = iter([FakeAPIError(503, "unavailable"), ConnectionResetError("reset by peer")])
+
+    def flaky(prompt):
+        error = next(failures, None)
+        if error:
+            raise error
+        return "Virechana"
+
+    model.reply = flaky
+    therapy, _ = asyncio.run(predict_panchakarma.predict_panchakarma_async(40, "Male", "acidity"))
+
+    assert therapy == "Virechana"
+    assert model.calls == 3
+    assert caller.stats()["retries"] == 2
+    assert caller.breaker.state == "closed"
+
+
+def test_upstream_timeout_is_retried_not_taken_for_the_deadline():
+    caller = ResilientCaller(backoff=0, retries=1, deadline=1.0)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise TimeoutError("read timed out")
+        return "Virechana"
+
+    assert asyncio.run(caller.call(call)) == "Virechana"
+    assert caller.stats()["retries"] == 1
+    assert "timeout" not in caller.stats()["latency"]
+
+
+def test_open_breaker_fails_fast_to_the_local_fallback(monkeypatch, model):
+    caller = use_caller(monkeypatch, retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    model.error = ConnectionError("upstream down")
+
+    for _ in range(4):
+        therapy, _ = asyncio.run(predict_panchakarma.predict_panchakarma_async(40, "Male", "joint pain"))
+        assert therapy == "Basti"
+
+    assert model.calls == 2
+    stats = caller.stats()
+    assert stats["breaker"]["state"] == "open"
+    assert stats["breaker"]["rejected"] == 2
+    assert stats["latency"]["rejected"]["count"] == 2
+
+
+def test_breaker_lets_one_trial_through_after_the_reset_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_hedged_request_wins_over_a_slow_primary():
+    caller = ResilientCaller(hedge_after=0.02, retries=0)
+    started = []
+
+    async def call():
+        started.append(time.perf_counter())
+        await asyncio.sleep(1.0 if len(started) == 1 else 0.01)
+        return "hedge" if len(started) > 1 else "primary"
+
+    start = time.perf_counter()
+    result = asyncio.run(caller.call(call))
+
+    assert result == "hedge"
+    assert time.perf_counter() - start < 0.5
+    assert caller.stats()["hedges"] == caller.stats()["hedge_wins"] == 1
+
+
+def test_saturation_does_not_count_against_the_breaker(monkeypatch, model):
+    caller = use_caller(monkeypatch, breaker=CircuitBreaker(failure_threshold=1))
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter(max_concurrency=1, max_queue=0))
+    model.latency = 0.05
+
+    async def run():
+        return await asyncio.gather(*(llm.generate_async("hi") for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert sum(isinstance(r, llm.Saturated) for r in results) == 1
+    assert caller.breaker.state == "closed"
+
+
+def test_blocking_generate_honours_the_deadline(monkeypatch, model):
+    caller = use_caller(monkeypatch, deadline=0.05)
+    model.latency = 1.0
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        llm.generate("hi")
+    assert time.perf_counter() - start < 0.5
+    assert caller.stats()["latency"]["timeout"]["count"] == 1
+
+
+def test_status_endpoint_reports_breaker_and_latency(monkeypatch, model):
+    use_caller(monkeypatch, breaker=CircuitBreaker(failure_threshold=1))
+    model.error = ConnectionError("upstream down")
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            chat = await client.post("/chat", json={"message": "What is Basti?"})
+            status = await client.get("/llm/status")
+        return chat, status
+
+    chat, status = asyncio.run(run())
+    assert chat.status_code == 200
+    body = status.json()
+    assert body["breaker"]["state"] == "open"
+    assert body["latency"]["error"]["count"] == 1
+    assert "limiter" in body
+
+
+def test_deterministic_errors_are_neither_retried_nor_counted(monkeypatch, model):
+    caller = use_caller(monkeypatch, retries=2, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    model.error = ValueError("response was blocked by safety filters")
+
+    for _ in range(3):
+        therapy, _ = asyncio.run(predict_panchakarma.predict_panchakarma_async(40, "Male", "joint pain"))
+        assert therapy == "Basti"
+
+    assert model.calls == 3
+    assert caller.stats()["retries"] == 0
+    assert caller.breaker.state == "closed"
+
+    model.error = FakeAPIError(429, "quota exceeded")
+    for _ in range(2):
+        asyncio.run(predict_panchakarma.predict_panchakarma_async(40, "Male", "joint pain"))
+    assert model.calls == 3 + 2 * 3
+    assert caller.breaker.state == "open"
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import llm
+import main
+import panchakarma_chatbot
+from fake_llm import FakeModel
+from sessions import SessionStore, compact, estimate_tokens, format_turn
+
+LONG_ANSWER = "**Basti** balances Vata dosha. " + "It nourishes and cleanses the colon. " * 40
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(llm, "_model", FakeModel(reply=LONG_ANSWER))
+    monkeypatch.setattr(llm, "limiter", llm.ConcurrencyLimiter())
+    monkeypatch.setattr(panchakarma_chatbot, "session_store", SessionStore())
+    return TestClient(main.app)
+
+
+def test_compact_keeps_recent_turns_within_budget():
+    turns = [{"user": f"question {i}", "assistant": LONG_ANSWER} for i in range(12)]
+
+    window, summary = compact(turns, [], budget=600)
+
+    assert window == turns[-len(window):]
+    used = sum(estimate_tokens(format_turn(t)) for t in window) + sum(estimate_tokens(line) for line in summary)
+    assert used <= 600
+    assert summary[-1].startswith(f"- User asked: question {11 - len(window)} | Assistant: Basti balances Vata dosha.")
+
+
+def test_conversation_id_replaces_history(client):
+    first = client.post("/chat", json={"message": "what is basti"}).json()
+    conversation_id = first["conversation_id"]
+    assert first["usage"]["history_turns"] == 0
+
+    second = client.post("/chat", json={"message": "is it safe", "conversation_id": conversation_id}).json()
+
+    assert second["conversation_id"] == conversation_id
+    assert second["usage"]["history_turns"] == 1
+    assert "User: what is basti" in llm._model.prompts[-1]
+
+
+def test_prompt_size_stays_bounded_on_long_sessions(client):
+    conversation_id = None
+    prompt_tokens = []
+    for i in range(25):
+        body = {"message": f"follow-up question number {i}", "conversation_id": conversation_id}
+        result = client.post("/chat", json=body).json()
+        conversation_id = result["conversation_id"]
+        prompt_tokens.append(result["usage"]["prompt_tokens"])
+
+    budget = panchakarma_chatbot.estimate_tokens(panchakarma_chatbot.SYSTEM_PROMPT) + 800 + 50
+    assert max(prompt_tokens) <= budget
+    assert result["usage"]["summary_lines"] > 0
+    assert "Summary of earlier conversation:" in llm._model.prompts[-1]
+
+
+def test_client_history_seeds_a_new_session(client):
+    history = [{"user": "what is nasya", "assistant": "Nasya is nasal administration."}]
+
+    result = client.post("/chat", json={"message": "and basti?", "history": history}).json()
+
+    assert result["usage"]["history_turns"] == 1
+    assert "User: what is nasya" in llm._model.prompts[-1]
+
+
+def test_sessions_expire_and_are_bounded():
+    now = [0.0]
+    store = SessionStore(ttl=10, maxsize=2, clock=lambda: now[0])
+    first = store.get()
+    first.record("hi", "hello")
+    store.save(first)
+
+    assert store.get(first.id) is first
+    now[0] = 11
+    assert store.get(first.id).is_empty
+
+    for conversation_id in "bc":
+        store.save(store.get(conversation_id))
+        store.get(conversation_id)
+    assert len(store) == 2
+
+
+def test_one_shot_calls_only_fill_the_pending_tier():
+    store = SessionStore(maxsize=2, pending_maxsize=3)
+    kept = store.get()
+    kept.record("what is basti", "Basti is a medicated enema.")
+    store.save(kept)
+    assert store.get(kept.id) is kept
+
+    for _ in range(10):
+        session = store.get()
+        session.record("what is nasya", "Nasya is nasal administration.")
+        store.save(session)
+    failed = store.get()
+
+    assert len(store) == 1 and store.pending == 3
+    assert store.get(kept.id) is kept
+    assert store.get(failed.id) is not failed
+
+
+def test_one_shot_chat_does_not_keep_a_session(client):
+    for _ in range(3):
+        client.post("/chat", json={"message": "what is basti"})
+
+    assert len(panchakarma_chatbot.session_store) == 0
+
+
+def test_stream_continues_a_conversation(client):
+    def stream(body):
+        lines = client.post("/chat/stream", json=body).text.splitlines()
+        return [json.loads(line) for line in lines][-1]
+
+    first = stream({"message": "what is basti"})
+    second = stream({"message": "is it safe", "conversation_id": first["conversation_id"]})
+
+    assert second["conversation_id"] == first["conversation_id"]
+    assert "User: what is basti" in llm._model.prompts[-1]
+    third = client.post("/chat", json={"message": "how long", "conversation_id": first["conversation_id"]}).json()
+    assert third["usage"]["history_turns"] + third["usage"]["summary_lines"] == 2
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import predict_panchakarma
+import worker
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_lines(stdout):
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def test_stdio_worker_answers_every_request_with_its_id():
+    release = threading.Event()
+
+    class Output(io.StringIO):
+        def write(self, data):
+            super().write(data)
+            if '"id"' in data:
+                release.set()
+
+    def handler(payload):
+        # The first request only finishes once another one has been answered
+        if payload["n"] == 0:
+            release.wait(timeout=5)
+        return {"double": payload["n"] * 2}
+
+    stdin = io.StringIO("".join(json.dumps({"id": f"r{n}", "n": n}) + "\n" for n in range(4)))
+    stdout = Output()
+    worker.serve_stdio(handler, concurrency=4, stdin=stdin, stdout=stdout)
+
+    ready, *responses = read_lines(stdout)
+    assert ready["type"] == "ready"
+    assert {r["id"]: r["double"] for r in responses} == {f"r{n}": n * 2 for n in range(4)}
+    assert responses[0]["id"] != "r0"
+
+
+def test_stdio_worker_reports_bad_lines_and_handler_errors():
+    def handler(payload):
+        raise ValueError("boom")
+
+    stdin = io.StringIO('not json\n\n{"id": 7}\n')
+    stdout = io.StringIO()
+    worker.serve_stdio(handler, concurrency=1, stdin=stdin, stdout=stdout)
+
+    _, invalid, failed = read_lines(stdout)
+    assert invalid["id"] is None and invalid["error"].startswith("Invalid JSON")
+    assert failed == {"id": 7, "error": "boom"}
+
+
+def test_predict_handle_matches_one_shot_contract(monkeypatch):
+    monkeypatch.setattr(predict_panchakarma, "predict_panchakarma", lambda *args, **kwargs: ("Nasya", ["Dr. A"]))
+
+    assert predict_panchakarma.handle({"age": 30, "gender": "Female", "complaint": "sinus"}) == {
+        "procedure": "Nasya",
+        "vaidya_list": ["Dr. A"],
+    }
+    assert "error" in predict_panchakarma.handle({"age": 30})
+
+
+def test_predict_script_worker_mode_end_to_end():
+    env = dict(os.environ, LLM_BACKEND="fake", PREDICTION_CACHE_PATH="")
+    requests = [{"id": i, "age": 40, "gender": "Male", "complaint": "joint pain"} for i in range(3)]
+    result = subprocess.run(
+        [sys.executable, "predict_panchakarma.py", "--worker"],
+        input="".join(json.dumps(r) + "\n" for r in requests),
+        capture_output=True, text=True, cwd=SERVICE_DIR, env=env, timeout=60,
+    )
+
+    ready, *responses = [json.loads(line) for line in result.stdout.splitlines()]
+    assert ready["type"] == "ready" and ready["startup_ms"] > 0
+    assert sorted(r["id"] for r in responses) == [0, 1, 2]
+    assert all(r["procedure"] for r in responses)
@@ -0,0 +1,122 @@
+"""
+Long-lived worker mode for the stdin/stdout entry points.
+
+Instead of one JSON object per process, a worker reads newline-delimited JSON
+requests, each carrying an "id", and answers with one JSON line per request
+echoing that id. Requests run concurrently on a thread pool, so responses may
+come back out of order. The first line written is a ready event with the
+measured start-up time:
+
+    {"type": "ready", "startup_ms": 41.7}
+    -> {"id": 1, "age": 40, "gender": "Male", "complaint": "joint pain"}
+    <- {"id": 1, "procedure": "Basti", "vaidya_list": [...]}
+
+Serve over stdin/stdout, or over a Unix socket with --socket PATH (one
+NDJSON stream per connection).
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Taken when an entry point script imports this module, before its heavier imports
+PROCESS_START = time.perf_counter()
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "8"))
+
+
+def _dispatch(handler, line, write):
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError as e:
+        write({"id": None, "error": f"Invalid JSON: {e}"})
+        return
+    request_id = payload.pop("id", None) if isinstance(payload, dict) else None
+    try:
+        result = handler(payload)
+    except Exception as e:
+        result = {"error": str(e)}
+    write({"id": request_id, **result})
+
+
+def _line_writer(stream):
+    lock = threading.Lock()
+
+    def write(message):
+        data = json.dumps(message) + "\n"
+        with lock:
+            stream.write(data)
+            stream.flush()
+
+    return write
+
+
+def serve_stdio(handler, concurrency=WORKER_CONCURRENCY, stdin=None, stdout=None, ready=None):
+    stdin = stdin or sys.stdin
+    write = _line_writer(stdout or sys.stdout)
+    write(ready or {"type": "ready"})
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for line in stdin:
+            if line.strip():
+                pool.submit(_dispatch, handler, line, write)
+    # Leaving the pool waits for in-flight requests before exiting on EOF
+
+
+def serve_socket(handler, path, concurrency=WORKER_CONCURRENCY, ready=None):
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            stream = self.wfile
+            writer = _line_writer(_TextSocketWriter(stream))
+            writer(ready or {"type": "ready"})
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if line.strip():
+                    pool.submit(_dispatch, handler, line, writer)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        try:
+            server.serve_forever()
+        finally:
+            pool.shutdown(wait=True)
+            os.unlink(path)
+
+
+class _TextSocketWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data.encode("utf-8"))
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run(handler, one_shot, argv=None):
+    """
+    Entry point shared by the scripts: one request per process by default,
+    a persistent worker with --worker.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--worker", action="store_true", help="serve NDJSON requests until EOF")
+    parser.add_argument("--socket", help="serve on this Unix socket path instead of stdin/stdout")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    if not args.worker and not args.socket:
+        one_shot()
+        return
+
+    ready = {"type": "ready", "startup_ms": round((time.perf_counter() - PROCESS_START) * 1000, 2)}
+    if args.socket:
+        serve_socket(handler, args.socket, args.concurrency, ready)
+    else:
+        serve_stdio(handler, args.concurrency, ready=ready)
@@ -0,0 +1,240 @@
+"""
+Versioned, memory-mappable recommender artifacts.
+
+An artifact is a directory of raw .npy arrays plus a meta.json holding the
+vocabulary, vectorizer settings and label tables:
+
+    artifacts/
+        CURRENT                 name of the active version
+        20261017093000/
+            meta.json
+            idf.npy
+            matrix_data.npy     CSR arrays of the normalized TF-IDF matrix
+            matrix_indices.npy
+            matrix_indptr.npy
+            row_therapy.npy     therapy code per doctor row
+            row_doctor.npy      doctor-name code per doctor row
+            therapy_rows.npy    rows grouped by therapy, in catalog order
+            therapy_offsets.npy
+            retrieval_*.npy     pruned top-k index (retrieval.py), for large catalogs
+
+Arrays are opened with np.load(mmap_mode="r"), so every uvicorn worker maps
+the same read-only pages instead of unpickling a private copy.
+
+Build from the pickles (run from the service directory):
+    python -m app.artifacts build [--root DIR] [--version NAME]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from . import retrieval
+from .symptom_index import RETRIEVAL_MIN_ROWS, RecommenderIndex
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_ROOT = os.getenv("PANCHAKARMA_ARTIFACT_DIR", os.path.join(BASE_DIR, "artifacts"))
+CURRENT_FILE = "CURRENT"
+
+# TfidfVectorizer settings needed to reproduce transform() from vocabulary + idf
+VECTORIZER_PARAMS = (
+    "lowercase", "strip_accents", "stop_words", "token_pattern",
+    "ngram_range", "analyzer", "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary",
+)
+
+ARRAYS = (
+    "idf", "matrix_data", "matrix_indices", "matrix_indptr",
+    "row_therapy", "row_doctor", "therapy_rows", "therapy_offsets",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _vectorizer_params(vectorizer):
+    params = vectorizer.get_params()
+    if params.get("tokenizer") or params.get("preprocessor") or callable(params.get("analyzer")):
+        raise ValueError("Vectorizers with custom callables cannot be exported as an artifact")
+    params = {name: params[name] for name in VECTORIZER_PARAMS}
+    if isinstance(params["stop_words"], (set, frozenset)):
+        params["stop_words"] = sorted(params["stop_words"])
+    params["ngram_range"] = list(params["ngram_range"])
+    return params
+
+
+def _rebuild_vectorizer(params, vocabulary, idf):
+    params = dict(params, ngram_range=tuple(params["ngram_range"]))
+    vectorizer = TfidfVectorizer(vocabulary=vocabulary, **params)
+    vectorizer.idf_ = np.asarray(idf)
+    return vectorizer
+
+
+def _index_dtype(n):
+    return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+
+def _retrieval_arrays(index, n_rows):
+    """The retrieval index's arrays under their artifact names, in compact dtypes."""
+    arrays = index.arrays()
+    n_vectors = len(arrays["vector_first_row"])
+    dtypes = {
+        "row_vector": _index_dtype(n_vectors),
+        "vector_rows": _index_dtype(n_rows),
+        "vector_offsets": np.int64,
+        "vector_first_row": _index_dtype(n_rows),
+        "vectors_data": np.float64,
+        "vectors_indices": np.int32,
+        "vectors_indptr": _index_dtype(len(arrays["vectors_data"])),
+        "posting_vectors": _index_dtype(n_vectors),
+        "posting_weights": np.float64,
+        "posting_offsets": np.int64,
+    }
+    return {f"retrieval_{name}": np.asarray(arrays[name], dtype=dtypes[name]) for name in retrieval.ARRAYS}
+
+
+def write_artifact(index, root=ARTIFACT_ROOT, version=None, make_current=True):
+    """
+    Write a RecommenderIndex as a new artifact version under root and,
+    unless make_current is False, point CURRENT at it. Returns the path.
+    """
+    version = version or time.strftime("%Y%m%d%H%M%S", time.gmtime())
+    path = os.path.join(root, version)
+    if os.path.exists(path):
+        raise FileExistsError(f"Artifact version {version} already exists in {root}")
+    os.makedirs(root, exist_ok=True)
+
+    matrix = index.symptom_matrix.tocsr()
+    matrix.sort_indices()
+    n_rows = matrix.shape[0]
+    arrays = {
+        "idf": np.asarray(index.vectorizer.idf_, dtype=np.float64),
+        "matrix_data": matrix.data.astype(np.float64),
+        "matrix_indices": matrix.indices.astype(np.int32),
+        "matrix_indptr": matrix.indptr.astype(_index_dtype(matrix.nnz)),
+        "row_therapy": np.asarray(index.row_therapy, dtype=np.int16),
+        "row_doctor": np.asarray(index.row_doctor, dtype=np.int32),
+        "therapy_rows": np.asarray(index.therapy_rows, dtype=_index_dtype(n_rows)),
+        "therapy_offsets": np.asarray(index.therapy_offsets, dtype=np.int64),
+    }
+    if index.retrieval is not None:
+        arrays.update(_retrieval_arrays(index.retrieval, n_rows))
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "shape": list(matrix.shape),
+        "vectorizer": _vectorizer_params(index.vectorizer),
+        "vocabulary": {term: int(col) for term, col in index.vectorizer.vocabulary_.items()},
+        "therapy_labels": list(index.therapy_labels),
+        "doctor_labels": list(index.doctor_labels),
+        "retrieval": index.retrieval is not None,
+    }
+
+    # Write into a temporary sibling and rename, so readers never see a partial version
+    tmp_path = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.rename(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    if make_current:
+        set_current(root, version)
+    return path
+
+
+def set_current(root, version):
+    pointer = os.path.join(root, CURRENT_FILE)
+    with open(pointer + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(pointer + ".tmp", pointer)
+
+
+def current_artifact_path(root=ARTIFACT_ROOT):
+    """Path of the version named in root/CURRENT, or None if nothing is built."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(root, version) if version else None
+
+
+def load_artifact(path):
+    """Open an artifact read-only and zero-copy as a RecommenderIndex."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported artifact format {meta.get('format')!r} in {path}")
+
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    symptom_matrix = csr_matrix(
+        (arrays["matrix_data"], arrays["matrix_indices"], arrays["matrix_indptr"]),
+        shape=tuple(meta["shape"]),
+        copy=False,
+    )
+    vectorizer = _rebuild_vectorizer(meta["vectorizer"], meta["vocabulary"], arrays["idf"])
+
+    retrieval_index = None
+    if meta.get("retrieval"):
+        retrieval_index = retrieval.TopKIndex.from_arrays(
+            {name: np.load(os.path.join(path, f"retrieval_{name}.npy"), mmap_mode="r") for name in retrieval.ARRAYS},
+            n_terms=symptom_matrix.shape[1],
+        )
+    elif symptom_matrix.shape[0] >= RETRIEVAL_MIN_ROWS:
+        # Never built at load time: that would cost every worker seconds and a private copy
+        logger.warning("Artifact %s has no retrieval index; rebuild it to prune top-k scoring", path)
+
+    return RecommenderIndex(
+        vectorizer,
+        symptom_matrix,
+        meta["therapy_labels"],
+        arrays["row_therapy"],
+        meta["doctor_labels"],
+        arrays["row_doctor"],
+        arrays["therapy_rows"],
+        arrays["therapy_offsets"],
+        version=meta["version"],
+        retrieval=retrieval_index,
+    )
+
+
+def build_from_pickles(root=ARTIFACT_ROOT, version=None, make_current=True):
+    from .load_data import load_pickles
+
+    df_doctor, vectorizer = load_pickles()
+    return write_artifact(RecommenderIndex.from_frame(df_doctor, vectorizer), root, version, make_current)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build memory-mappable recommender artifacts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="export doctor_data.pkl + vectorizer.pkl")
+    build.add_argument("--root", default=ARTIFACT_ROOT)
+    build.add_argument("--version")
+    build.add_argument("--no-current", action="store_true", help="do not point CURRENT at the new version")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = build_from_pickles(args.root, args.version, make_current=not args.no_current)
+    print(f"Wrote {path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    load_artifact(path)
+    print(f"Opened it memory-mapped in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
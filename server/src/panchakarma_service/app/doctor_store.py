@@ -0,0 +1,99 @@
+import os
+import time
+from collections import OrderedDict
+
+from .metrics import CACHE_LOOKUPS, stage
+
+# Only the fields recommend_system returns are pulled from MongoDB
+DOCTOR_PROJECTION = {"_id": 1, "name": 1, "email": 1, "phone": 1, "address": 1, "profile": 1}
+
+DOCTOR_CACHE_TTL = float(os.getenv("DOCTOR_CACHE_TTL", "300"))
+DOCTOR_CACHE_SIZE = int(os.getenv("DOCTOR_CACHE_SIZE", "1024"))
+
+
+class DoctorCache:
+    """
+    In-process LRU cache of doctor documents keyed by name, with a TTL.
+
+    Names that are not in MongoDB are cached as None so unknown vaidyas
+    do not trigger a lookup on every request.
+    """
+
+    def __init__(self, maxsize=DOCTOR_CACHE_SIZE, ttl=DOCTOR_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+
+    def get_many(self, names):
+        """Return (cached docs by name, names that need a lookup)."""
+        now = self.clock()
+        found, missing = {}, []
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(name, None)
+                missing.append(name)
+                continue
+            self._entries.move_to_end(name)
+            found[name] = entry[1]
+        return found, missing
+
+    def put(self, name, doc):
+        self._entries[name] = (self.clock() + self.ttl, doc)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, names=None):
+        """Drop the given doctor names, or the whole cache when names is None."""
+        if names is None:
+            self._entries.clear()
+            return
+        for name in names:
+            self._entries.pop(name, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DoctorStore:
+    """
+    Resolves doctor names to MongoDB user documents with one `$in` query per
+    call, serving repeated names from a DoctorCache.
+    """
+
+    def __init__(self, collection, cache=None):
+        self.collection = collection
+        self.cache = cache if cache is not None else DoctorCache()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("name", 1), ("role", 1)])
+
+    async def fetch(self, names):
+        """Return {name: document or None} for every requested name."""
+        names = list(dict.fromkeys(names))
+        doctors, missing = self.cache.get_many(names)
+        CACHE_LOOKUPS.labels(cache="doctor", result="hit").inc(len(doctors))
+        CACHE_LOOKUPS.labels(cache="doctor", result="miss").inc(len(missing))
+        if not missing:
+            return doctors
+
+        fetched = {}
+        with stage("mongo"):
+            cursor = self.collection.find(
+                {"name": {"$in": missing}, "role": "doctor"},
+                DOCTOR_PROJECTION,
+            )
+            async for doc in cursor:
+                # Keep the first match per name, as find_one did
+                fetched.setdefault(doc["name"], doc)
+
+        for name in missing:
+            doc = fetched.get(name)
+            self.cache.put(name, doc)
+            doctors[name] = doc
+        return doctors
+
+    def invalidate(self, names=None):
+        self.cache.invalidate(names)
@@ -1,12 +1,43 @@
+import logging
+import os
 import pickle
-import pandas as pd
 
-# Load doctor data
-with open("doctor_data.pkl", "rb") as f:
-    df_doctor = pickle.load(f)
+from .artifacts import current_artifact_path, load_artifact
+from .symptom_index import RecommenderIndex
 
-# Load vectorizer
-with open("vectorizer.pkl", "rb") as f:
-    vectorizer = pickle.load(f)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-__all__ = ["df_doctor", "vectorizer"]
+logger = logging.getLogger(__name__)
+
+
+def load_pickles():
+    """Load the original pickled doctor DataFrame and TF-IDF vectorizer."""
+    # Load doctor data
+    with open(os.path.join(BASE_DIR, "doctor_data.pkl"), "rb") as f:
+        df_doctor = pickle.load(f)
+
+    # Load vectorizer
+    with open(os.path.join(BASE_DIR, "vectorizer.pkl"), "rb") as f:
+        vectorizer = pickle.load(f)
+
+    return df_doctor, vectorizer
+
+
+def load_index():
+    """
+    Open the current memory-mapped artifact when one has been built, falling
+    back to the pickles otherwise.
+    """
+    artifact_path = current_artifact_path()
+    if artifact_path:
+        try:
+            return load_artifact(artifact_path)
+        except Exception as e:
+            logger.warning("Could not open artifact %s, falling back to pickles: %s", artifact_path, e)
+
+    df_doctor, vectorizer = load_pickles()
+    version = "pickle-%d" % os.path.getmtime(os.path.join(BASE_DIR, "doctor_data.pkl"))
+    return RecommenderIndex.from_frame(df_doctor, vectorizer, version=version)
+
+
+__all__ = ["load_pickles", "load_index", "RecommenderIndex"]
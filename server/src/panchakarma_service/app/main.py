@@ -1,9 +1,23 @@
-from fastapi import FastAPI
-from .models import UserInput
-from .recommender import recommend_system
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from . import metrics, recommender
+from .models import UserInput, DoctorInvalidation
+from .recommender import recommend_cached, recommend_batch, doctor_store
+from .registry import registry, MODEL_RELOAD_INTERVAL
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="Panchakarma Recommendation API")
+logger = logging.getLogger(__name__)
+
+# Batches larger than this are streamed back as NDJSON, one chunk at a time
+BATCH_STREAM_THRESHOLD = int(os.getenv("BATCH_STREAM_THRESHOLD", "500"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "250"))
 
 
 
@@ -30,13 +44,114 @@ app.add_middleware(
 
 
 
+metrics.from_function(
+    "gauge", "panchakarma_doctor_cache_entries", "Doctor documents held in the in-process cache",
+    lambda: {(): len(doctor_store.cache)},
+)
+
+
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def ensure_doctor_indexes():
+    # Compound {name, role} index backs the batched doctor lookup
+    try:
+        await doctor_store.ensure_indexes()
+    except Exception as e:
+        logger.warning("Could not ensure doctor indexes: %s", e)
+
+
+@app.on_event("startup")
+async def start_model_watcher():
+    # Pick up new artifact versions without a restart
+    if MODEL_RELOAD_INTERVAL > 0:
+        app.state.model_watcher = asyncio.create_task(registry.watch(MODEL_RELOAD_INTERVAL))
+
+
 @app.post("/recommend")
-async def get_recommendation(user_input: UserInput):
-    result = await recommend_system(
+async def get_recommendation(user_input: UserInput, request: Request):
+    """
+    Recommendation for one intake record, served from the response cache when
+    the same symptoms (in any order) and severity were seen recently.
+
+    The response carries an ETag of its body; a request whose If-None-Match
+    matches it gets an empty 304 instead.
+    """
+    result, hit = await recommend_cached(
         user_symptoms=user_input.symptoms,
         severity=user_input.severity,
         top_n=5
     )
-    print(result)
-    return result
+    logger.debug("Recommendation: %s", result)
+
+    response = JSONResponse(result)
+    etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={int(recommender.response_cache.ttl)}",
+        "X-Cache": "hit" if hit else "miss",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+@app.get("/recommend/cache")
+async def recommendation_cache_stats():
+    """Hit rate and size of the /recommend response cache."""
+    return recommender.response_cache.stats()
+
+
+@app.post("/recommend/batch")
+async def get_batch_recommendation(user_inputs: list[UserInput], stream: bool = False):
+    """
+    Recommend for a list of intake records, returned in input order.
+
+    Small batches are answered as {"results": [...]}. With ?stream=true, or
+    above BATCH_STREAM_THRESHOLD records, results are streamed as NDJSON
+    lines of {"index": i, ...} computed chunk by chunk.
+    """
+    requests = [(user_input.symptoms, user_input.severity) for user_input in user_inputs]
+
+    if not stream and len(requests) <= BATCH_STREAM_THRESHOLD:
+        return {"results": await recommend_batch(requests, top_n=5)}
+
+    async def ndjson_lines():
+        for start in range(0, len(requests), BATCH_CHUNK_SIZE):
+            chunk = await recommend_batch(requests[start:start + BATCH_CHUNK_SIZE], top_n=5)
+            yield "".join(
+                json.dumps({"index": start + offset, **result}) + "\n"
+                for offset, result in enumerate(chunk)
+            )
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@app.post("/admin/doctors/invalidate")
+async def invalidate_doctors(body: DoctorInvalidation):
+    """Drop cached doctor documents, e.g. after a profile update in MongoDB."""
+    doctor_store.invalidate(body.names)
+    # Cached responses embed doctor documents too
+    recommender.response_cache.clear()
+    return {"invalidated": body.names if body.names is not None else "all"}
+
+
+@app.post("/admin/reload")
+async def reload_model():
+    """Load the current artifact (or pickles) in the background and swap it in."""
+    return await registry.reload()
+
+
+@app.get("/admin/reload")
+async def reload_status():
+    """Loaded data version plus timing and memory of the last reload."""
+    return registry.status()
+
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage timings, request latency, cache hits and in-flight requests in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,158 @@
+"""
+Prometheus metrics and per-request stage profiling.
+
+Metric types and the text exposition for GET /metrics come from
+prometheus_client. `stage(name)` times a block into the stage histogram
+and, when the current request asked for a profile (X-Profile: 1), into that
+request's breakdown as well.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.routing import Match
+
+PREFIX = "panchakarma"
+
+# Seconds; stage timings range from microseconds (cache hits) to seconds (cold Mongo)
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+disable_created_metrics()
+REGISTRY = CollectorRegistry()
+_profile = contextvars.ContextVar("profile", default=None)
+
+STAGE_SECONDS = Histogram(
+    f"{PREFIX}_stage_seconds", "Time spent in each stage of request handling", ["stage"],
+    buckets=DEFAULT_BUCKETS, registry=REGISTRY,
+)
+REQUEST_SECONDS = Histogram(
+    f"{PREFIX}_http_request_seconds", "HTTP request latency", ["method", "path", "status"],
+    buckets=DEFAULT_BUCKETS, registry=REGISTRY,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    f"{PREFIX}_http_requests_in_flight", "HTTP requests being handled", ["path"], registry=REGISTRY,
+)
+CACHE_LOOKUPS = Counter(
+    f"{PREFIX}_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"], registry=REGISTRY,
+)
+
+
+class _FunctionCollector:
+    """Reads numbers another component already counts at scrape time."""
+
+    def __init__(self, family, name, documentation, function, labelnames):
+        self.family = family
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.labelnames = list(labelnames)
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        metric = self.family(self.name, self.documentation, labels=self.labelnames)
+        for key, value in self.function().items():
+            metric.add_metric([str(v) for v in key], value)
+        yield metric
+
+
+def from_function(kind, name, documentation, function, labelnames=()):
+    """
+    Register a "counter" or "gauge" whose `function` returns
+    {label values tuple: value} when /metrics is scraped.
+    """
+    family = {"counter": CounterMetricFamily, "gauge": GaugeMetricFamily}[kind]
+    REGISTRY.register(_FunctionCollector(family, name, documentation, function, labelnames))
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format."""
+    return generate_latest(REGISTRY).decode()
+
+
+def record_stage(name, seconds):
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+    profile = _profile.get()
+    if profile is not None:
+        profile[name] = profile.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def server_timing(profile, total=None):
+    """Server-Timing header value for a stage breakdown, durations in milliseconds."""
+    entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in profile.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+def route_label(scope):
+    """
+    Path template of the route a request matches ("/items/{id}"), or "other",
+    so scanned or mistyped URLs cannot create a new series each.
+    """
+    router = getattr(scope.get("app"), "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # right path, other method: answered 405
+    return partial or "other"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and in-flight requests, labelled
+    by route template. With an
+    `X-Profile: 1` request header, the stages timed before the response starts
+    are returned in a Server-Timing header.
+
+    Plain ASGI rather than @app.middleware("http"), which would buffer
+    streaming responses and hide client disconnects from the endpoints.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path, method = route_label(scope), scope["method"]
+        profile = {} if (b"x-profile", b"1") in scope.get("headers", []) else None
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    header = server_timing(profile, total=time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(path=path)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_flight.dec()
+            REQUEST_SECONDS.labels(method=method, path=path, status=status).observe(time.perf_counter() - start)
+            _profile.reset(token)
@@ -5,3 +5,6 @@ class UserInput(BaseModel):
     gender: str
     symptoms: str
     severity: str  # "sometimes", "often", "always"
+
+class DoctorInvalidation(BaseModel):
+    names: list[str] | None = None  # None clears the whole doctor cache
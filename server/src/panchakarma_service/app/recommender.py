@@ -1,5 +1,7 @@
-from .load_data import df_doctor, vectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from .registry import registry
+from .doctor_store import DoctorStore
+from .metrics import CACHE_LOOKUPS, stage
+from .response_cache import ResponseCache, canonical_symptom, response_key
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
@@ -8,58 +10,140 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 client = AsyncIOMotorClient(MONGO_URI)
 db = client["SIHProj"]  # replace with your actual DB name
 users_collection = db["users"]
+doctor_store = DoctorStore(users_collection)
+response_cache = ResponseCache()
+
+
+def _doctor_payload(doctor_doc):
+    return {
+        "doctorId": str(doctor_doc["_id"]),
+        "name": doctor_doc["name"],
+        "email": doctor_doc.get("email"),
+        "phone": doctor_doc.get("phone"),
+        "address": doctor_doc.get("address", {}),
+        "profile": doctor_doc.get("profile", {})
+    }
+
+
+def split_symptoms(user_symptoms):
+    return [s.strip() for s in user_symptoms.replace("and", ",").split(",") if s.strip()]
+
+
+def _self_monitor():
+    return {
+        "action": "self-monitor",
+        "suggestion": "Monitor your symptoms carefully. Consult a doctor if they worsen."
+    }
+
 
 async def recommend_system(user_symptoms, severity, top_n=3):
     """
     Returns self-monitor advice or doctor + therapy recommendations
     enriched with MongoDB details (_id, email, location).
     """
-    if severity.lower() == "sometimes":
-        return {
-            "action": "self-monitor",
-            "suggestion": "Monitor your symptoms carefully. Consult a doctor if they worsen."
-        }
-
-    # Split symptoms
-    symptoms_list = [s.strip() for s in user_symptoms.replace("and", ",").split(",") if s.strip()]
-    
-    therapy_recommendations = []
-    recommended_therapies = set()
-
-    for symptom in symptoms_list:
-        user_vec = vectorizer.transform([symptom])
-        cosine_sim = cosine_similarity(user_vec, vectorizer.transform(df_doctor["symptoms"].astype(str))).flatten()
-        
-        top_idx = cosine_sim.argmax()
-        therapy = df_doctor.iloc[top_idx]["panchakarma"]
-
-        if therapy not in recommended_therapies:
-            recommended_therapies.add(therapy)
-            therapy_doctors = df_doctor[df_doctor["panchakarma"] == therapy].head(top_n)
-
-            doctors = []
-            for _, row in therapy_doctors.iterrows():
-                doctor_name = row["vaidya_name"]
-                
-                # Fetch doctor from MongoDB by name
-                doctor_doc = await users_collection.find_one({"name": doctor_name, "role": "doctor"})
-                
-                if doctor_doc:
-                    doctors.append({
-                        "doctorId": str(doctor_doc["_id"]),
-                        "name": doctor_doc["name"],
-                        "email": doctor_doc.get("email"),
-                        "phone": doctor_doc.get("phone"),
-                        "address": doctor_doc.get("address", {}),
-                        "profile": doctor_doc.get("profile", {})
-                    })
-
-            therapy_recommendations.append({
-                "therapy": therapy,
-                "doctors": doctors
-            })
+    results = await recommend_batch([(user_symptoms, severity)], top_n=top_n)
+    return results[0]
+
+
+async def recommend_batch(requests, top_n=3):
+    """
+    Recommend for many (user_symptoms, severity) pairs at once.
+
+    Every symptom of the batch is scored in one matrix product, therapy ->
+    doctor lookups are shared across the batch and MongoDB is queried once.
+    Results are returned in input order and carry the data version used.
+    """
+    # One snapshot per call, so a concurrent reload cannot mix versions
+    index = registry.current
+
+    # Split symptoms; None marks a self-monitor request
+    symptom_lists = [
+        None if severity.lower() == "sometimes" else split_symptoms(user_symptoms)
+        for user_symptoms, severity in requests
+    ]
 
+    # Score all symptoms of the batch against the precomputed index in one pass
+    flat_symptoms = [symptom for symptoms in symptom_lists if symptoms for symptom in symptoms]
+    symptom_therapies = iter(index.top_therapies(flat_symptoms, k=1))
+
+    therapy_doctor_names = {}
+    request_therapies = []
+    with stage("doctor_lookup"):
+        for symptoms in symptom_lists:
+            if symptoms is None:
+                request_therapies.append(None)
+                continue
+
+            therapies = list(dict.fromkeys(next(symptom_therapies)[0] for _ in symptoms))
+            for therapy in therapies:
+                if therapy not in therapy_doctor_names:
+                    therapy_doctor_names[therapy] = index.doctor_names(therapy, top_n)
+            request_therapies.append(therapies)
+
+    therapy_recommendations = await _therapy_doctors(therapy_doctor_names)
+
+    with stage("response_build"):
+        return _build_results(index, request_therapies, therapy_recommendations)
+
+
+async def _therapy_doctors(therapy_doctor_names):
+    """{therapy: doctor payloads}, fetching every doctor from MongoDB in one round-trip."""
+    doctor_docs = await doctor_store.fetch(
+        name for names in therapy_doctor_names.values() for name in names
+    )
     return {
-        "action": "visit doctor",
-        "recommendations": therapy_recommendations
+        therapy: [_doctor_payload(doctor_docs[name]) for name in doctor_names if doctor_docs.get(name)]
+        for therapy, doctor_names in therapy_doctor_names.items()
     }
+
+
+def _build_results(index, request_therapies, therapy_recommendations):
+    results = []
+    for therapies in request_therapies:
+        if therapies is None:
+            results.append({**_self_monitor(), "data_version": index.version})
+            continue
+        results.append({
+            "action": "visit doctor",
+            "recommendations": [
+                {"therapy": therapy, "doctors": therapy_recommendations[therapy]}
+                for therapy in therapies
+            ],
+            "data_version": index.version
+        })
+    return results
+
+
+async def recommend_cached(user_symptoms, severity, top_n=3):
+    """
+    recommend_system served through response_cache. Returns (result, hit).
+
+    Symptoms are split as usual, then case- and spacing-folded and sorted for
+    the key, so reordered or re-cased repeats of a request share one entry.
+    The result is identical to recommend_system's.
+    """
+    index = registry.current
+    if severity.lower() == "sometimes":
+        return {**_self_monitor(), "data_version": index.version}, False
+
+    lowercase = getattr(index.vectorizer, "lowercase", True)
+    symptoms = [canonical_symptom(s, lowercase) for s in split_symptoms(user_symptoms)]
+    key = response_key(symptoms, severity, top_n, index.version)
+
+    entry = response_cache.get(key)
+    hit = entry is not None
+    CACHE_LOOKUPS.labels(cache="response", result="hit" if hit else "miss").inc()
+    if not hit:
+        distinct = list(key[0])
+        therapies = [top[0] for top in index.top_therapies(distinct, k=1)]
+        with stage("doctor_lookup"):
+            therapy_doctor_names = {
+                therapy: index.doctor_names(therapy, top_n) for therapy in dict.fromkeys(therapies)
+            }
+        entry = dict(zip(distinct, therapies)), await _therapy_doctors(therapy_doctor_names)
+        response_cache.put(key, entry)
+
+    therapy_of, therapy_recommendations = entry
+    with stage("response_build"):
+        request_therapies = [list(dict.fromkeys(therapy_of[symptom] for symptom in symptoms))]
+        return _build_results(index, request_therapies, therapy_recommendations)[0], hit
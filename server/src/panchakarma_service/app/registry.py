@@ -0,0 +1,122 @@
+import asyncio
+import gc
+import logging
+import os
+import time
+
+from .artifacts import ARTIFACT_ROOT, current_artifact_path, load_artifact
+from .load_data import load_index
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of artifacts/CURRENT for a new version; 0 disables the watcher
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "0"))
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Holds the active RecommenderIndex and swaps in new versions without a restart.
+
+    A request reads `registry.current` once and keeps that reference, so a swap
+    never changes the data under an in-flight request; the old index is freed
+    once the last request holding it finishes.
+
+    Reloads open the version named in CURRENT strictly: a broken artifact
+    keeps the running index and is not retried until CURRENT changes.
+    """
+
+    def __init__(self, loader=load_index, artifact_root=ARTIFACT_ROOT, artifact_loader=load_artifact):
+        self.loader = loader
+        self.artifact_root = artifact_root
+        self.artifact_loader = artifact_loader
+        self.current = loader()
+        self.loaded_at = time.time()
+        self.last_reload = None
+        self.failed_version = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def pending_version(self):
+        """Version named in artifacts/CURRENT when it differs from the loaded one and has not failed."""
+        path = current_artifact_path(self.artifact_root)
+        if path is None:
+            return None
+        version = os.path.basename(path)
+        return version if version not in (self.current.version, self.failed_version) else None
+
+    async def reload(self):
+        """Build the latest index in a worker thread and atomically swap it in."""
+        async with self._lock:
+            previous = self.current.version
+            rss_before = rss_bytes()
+            start = time.perf_counter()
+
+            path = current_artifact_path(self.artifact_root)
+            try:
+                if path is None:
+                    # Nothing built yet: the default loader reads the pickles
+                    new_index = await asyncio.to_thread(self.loader)
+                else:
+                    new_index = await asyncio.to_thread(self.artifact_loader, path)
+            except Exception as e:
+                self.failed_version = os.path.basename(path) if path else None
+                self.last_reload = {
+                    "previous_version": previous,
+                    "version": previous,
+                    "failed_version": self.failed_version,
+                    "error": str(e),
+                    "finished_at": time.time(),
+                }
+                logger.warning("Could not load recommender data %s, keeping %s: %s", self.failed_version, previous, e)
+                return self.last_reload
+            build_ms = (time.perf_counter() - start) * 1000
+            self.failed_version = None
+
+            self.current = new_index
+            self.loaded_at = time.time()
+            gc.collect()
+
+            self.last_reload = {
+                "previous_version": previous,
+                "version": new_index.version,
+                "build_ms": round(build_ms, 2),
+                "rss_before_bytes": rss_before,
+                "rss_after_bytes": rss_bytes(),
+                "finished_at": self.loaded_at,
+            }
+            logger.info("Reloaded recommender data %s -> %s in %.1f ms", previous, new_index.version, build_ms)
+            return self.last_reload
+
+    async def watch(self, interval=MODEL_RELOAD_INTERVAL):
+        """Poll artifacts/CURRENT and reload whenever it names a new version."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.pending_version():
+                    await self.reload()
+            except Exception as e:
+                logger.warning("Recommender reload failed, keeping %s: %s", self.current.version, e)
+
+    def status(self):
+        return {
+            "version": self.current.version,
+            "loaded_at": self.loaded_at,
+            "pending_version": self.pending_version(),
+            "rss_bytes": rss_bytes(),
+            "last_reload": self.last_reload,
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,68 @@
+import os
+import time
+from collections import OrderedDict
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+
+
+def canonical_symptom(symptom, lowercase=True):
+    """Spelling of a split symptom that vectorizes identically: case and spacing folded."""
+    symptom = " ".join(symptom.split())
+    return symptom.lower() if lowercase else symptom
+
+
+def response_key(symptoms, severity, top_n, data_version):
+    """Cache key for already-canonical symptoms; their order and repeats do not matter."""
+    return tuple(sorted(set(symptoms))), severity.lower(), top_n, data_version
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of /recommend building blocks, with a TTL.
+
+    Entries hold {symptom: therapy} and {therapy: doctor payloads} rather than
+    finished responses, so requests listing the same symptoms in another order
+    share an entry and still get recommendations in their own order. Keys
+    include the data version, so a model reload never serves stale therapies;
+    the TTL bounds how stale the MongoDB doctor fields can get.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            self._entries.pop(key, None)
+            self.metrics["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.metrics["hits"] += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "entries": len(self._entries),
+            "ttl_s": self.ttl,
+            "hit_rate": round(self.metrics["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
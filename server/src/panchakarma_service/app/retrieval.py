@@ -0,0 +1,207 @@
+"""
+Exact top-k cosine retrieval over a large TF-IDF catalog without scoring every row.
+
+Identical rows are collapsed into one distinct vector first (catalogs repeat
+the same symptom strings a lot). Each term then gets an impact-ordered
+posting list of the distinct vectors that contain it, heaviest weight first.
+A query walks its terms' lists in growing blocks (threshold algorithm): every
+vector met is scored exactly, and the walk stops once the best possible score
+of any vector not met yet, sum(q_t * next weight in list t), falls below the
+current k-th best score.
+
+Scores are accumulated term by term in ascending term order, the same order
+as `query @ matrix.T`, so they are bit-identical to brute force, and ties
+resolve to the lowest row as a stable argsort would.
+
+The index is plain arrays (ARRAYS), so artifacts.py stores it next to the
+matrix and every worker memory-maps the same pages instead of rebuilding it.
+"""
+import numpy as np
+import scipy.sparse as sp
+
+from .symptom_index import group_rows
+
+# Postings read per term in the first block; each further block is twice as deep
+FIRST_BLOCK = 64
+
+# What a TopKIndex is made of, in the order the constructor takes them
+ARRAYS = (
+    "row_vector", "vector_rows", "vector_offsets", "vector_first_row",
+    "vectors_data", "vectors_indices", "vectors_indptr",
+    "posting_vectors", "posting_weights", "posting_offsets",
+)
+
+
+def _distinct_rows(matrix):
+    """Map every row to the id of its distinct vector, numbered by first occurrence."""
+    ids = {}
+    codes = np.empty(matrix.shape[0], dtype=np.int64)
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+    for row in range(matrix.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        key = indices[start:end].tobytes() + data[start:end].tobytes()
+        codes[row] = ids.setdefault(key, len(ids))
+    return codes, len(ids)
+
+
+class TopKIndex:
+    """
+    Built from a matrix with `TopKIndex.build`; the constructor takes the
+    finished arrays, which may be read-only memory maps.
+    """
+
+    def __init__(self, row_vector, vector_rows, vector_offsets, vector_first_row,
+                 vectors, posting_vectors, posting_weights, posting_offsets):
+        self.n_rows = len(row_vector)
+        self.row_vector = row_vector
+        self.vector_rows = vector_rows
+        self.vector_offsets = vector_offsets
+        self.vector_first_row = vector_first_row
+        self.vectors = vectors
+        self.posting_vectors = posting_vectors
+        self.posting_weights = posting_weights
+        self.posting_offsets = posting_offsets
+
+    @classmethod
+    def build(cls, matrix):
+        matrix = sp.csr_matrix(matrix)
+        matrix.sort_indices()
+
+        row_vector, n_vectors = _distinct_rows(matrix)
+        # Rows of each distinct vector in ascending order; the first one is its representative
+        vector_rows, vector_offsets = group_rows(row_vector, n_vectors)
+        vector_first_row = vector_rows[vector_offsets[:-1]]
+        vectors = matrix[vector_first_row]
+
+        # Impact-ordered postings: per term, distinct vectors by descending weight
+        postings = vectors.tocoo()
+        order = np.lexsort((postings.row, -postings.data, postings.col))
+        posting_offsets = np.zeros(matrix.shape[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(postings.col, minlength=matrix.shape[1]), out=posting_offsets[1:])
+        return cls(
+            row_vector, vector_rows, vector_offsets, vector_first_row, vectors,
+            postings.row[order].astype(np.int64), postings.data[order], posting_offsets,
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, n_terms):
+        """Index over {name: array} as returned by `arrays()`, without copying them."""
+        indptr = arrays["vectors_indptr"]
+        vectors = sp.csr_matrix(
+            (arrays["vectors_data"], arrays["vectors_indices"], indptr),
+            shape=(len(indptr) - 1, n_terms),
+            copy=False,
+        )
+        return cls(
+            arrays["row_vector"], arrays["vector_rows"], arrays["vector_offsets"], arrays["vector_first_row"],
+            vectors, arrays["posting_vectors"], arrays["posting_weights"], arrays["posting_offsets"],
+        )
+
+    def arrays(self):
+        return {
+            "row_vector": self.row_vector,
+            "vector_rows": self.vector_rows,
+            "vector_offsets": self.vector_offsets,
+            "vector_first_row": self.vector_first_row,
+            "vectors_data": self.vectors.data,
+            "vectors_indices": self.vectors.indices,
+            "vectors_indptr": self.vectors.indptr,
+            "posting_vectors": self.posting_vectors,
+            "posting_weights": self.posting_weights,
+            "posting_offsets": self.posting_offsets,
+        }
+
+    def _score(self, vectors, terms, weights):
+        columns = self.vectors[vectors][:, terms].toarray()
+        scores = np.zeros(len(vectors))
+        for j, weight in enumerate(weights):
+            scores = scores + weight * columns[:, j]
+        return scores
+
+    def _bound(self, terms, weights, depth):
+        bound = 0.0
+        for term, weight in zip(terms, weights):
+            position = self.posting_offsets[term] + depth
+            if position < self.posting_offsets[term + 1]:
+                bound = bound + weight * self.posting_weights[position]
+        return bound
+
+    def _kth_score(self, scores, counts, k):
+        """Score of the k-th best row among the scored vectors, or None with fewer than k rows."""
+        order = np.argsort(-scores, kind="stable")
+        reached = np.searchsorted(np.cumsum(counts[order]), k)
+        return scores[order[reached]] if reached < len(order) else None
+
+    def top_rows(self, terms, weights, k=1):
+        """
+        The k best rows for one L2-normalized query given as ascending term
+        ids and their weights, best first, exactly as
+        `np.argsort(-(query @ matrix.T), kind="stable")[:k]`.
+        """
+        k = min(k, self.n_rows)
+        terms = np.asarray(terms, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        seen = np.zeros(len(self.vector_first_row), dtype=bool)
+        vectors = np.empty(0, dtype=np.int64)
+        scores = np.empty(0)
+        counts = np.minimum(np.diff(self.vector_offsets), k)
+
+        depth, block = 0, FIRST_BLOCK
+        while len(terms):
+            met = np.concatenate([
+                self.posting_vectors[self.posting_offsets[t] + depth:
+                                     min(self.posting_offsets[t + 1], self.posting_offsets[t] + depth + block)]
+                for t in terms
+            ])
+            met = np.unique(met)
+            met = met[~seen[met]]
+            seen[met] = True
+            depth += block
+            block *= 2
+
+            if len(met):
+                vectors = np.concatenate([vectors, met])
+                scores = np.concatenate([scores, self._score(met, terms, weights)])
+
+            bound = self._bound(terms, weights, depth)
+            if bound == 0.0:
+                break
+            kth = self._kth_score(scores, counts[vectors], k)
+            if kth is not None:
+                if bound < kth:
+                    break
+                # Vectors below the k-th score can never make it back in
+                keep = scores >= kth
+                vectors, scores = vectors[keep], scores[keep]
+
+        return self._collect(vectors, scores, k)
+
+    def _collect(self, vectors, scores, k):
+        positive = scores > 0
+        vectors, scores = vectors[positive], scores[positive]
+        order = np.lexsort((self.vector_first_row[vectors], -scores))
+
+        result = []
+        i = 0
+        while i < len(order) and len(result) < k:
+            # Vectors sharing a score compete on row order
+            tier_end = i
+            while tier_end < len(order) and scores[order[tier_end]] == scores[order[i]]:
+                tier_end += 1
+            rows = np.concatenate([
+                self.vector_rows[self.vector_offsets[v]:min(self.vector_offsets[v + 1], self.vector_offsets[v] + k)]
+                for v in vectors[order[i:tier_end]]
+            ])
+            result.extend(np.sort(rows)[:k - len(result)].tolist())
+            i = tier_end
+
+        if len(result) < k:
+            # Every matching row is in; the rest score zero and follow in row order
+            matched = np.zeros(len(self.vector_first_row), dtype=bool)
+            matched[vectors] = True
+            row = 0
+            while len(result) < k:
+                if not matched[self.row_vector[row]]:
+                    result.append(row)
+                row += 1
+        return np.asarray(result, dtype=np.int64)
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import normalize
+
+from .metrics import stage
+
+# Catalogs with at least this many rows answer top-k through the pruned
+# inverted index in retrieval.py instead of scoring every row
+RETRIEVAL_MIN_ROWS = int(os.getenv("RETRIEVAL_MIN_ROWS", "20000"))
+
+
+def group_rows(codes, n_groups):
+    """Rows ordered by code (catalog order within a code) plus per-code offsets."""
+    rows = np.argsort(codes, kind="stable")
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=n_groups), out=offsets[1:])
+    return rows, offsets
+
+
+class RecommenderIndex:
+    """
+    Precomputed lookup structures for the recommender, built once at load time.
+
+    `symptom_matrix` is the L2-normalized TF-IDF matrix of every doctor row.
+    Therapies and doctor names are stored as integer codes per row plus label
+    tuples, and `therapy_rows`/`therapy_offsets` list each therapy's rows in
+    catalog order, so a request never re-vectorizes or scans the doctor table.
+    Every array can be a read-only memory map (see artifacts.py), including
+    those of the optional pruned `retrieval` index.
+    """
+
+    def __init__(self, vectorizer, symptom_matrix, therapy_labels, row_therapy,
+                 doctor_labels, row_doctor, therapy_rows, therapy_offsets, version=None, retrieval=None):
+        self.vectorizer = vectorizer
+        self.symptom_matrix = symptom_matrix
+        self.therapy_labels = tuple(therapy_labels)
+        self.row_therapy = row_therapy
+        self.doctor_labels = tuple(doctor_labels)
+        self.row_doctor = row_doctor
+        self.therapy_rows = therapy_rows
+        self.therapy_offsets = therapy_offsets
+        self.version = version
+        self._therapy_codes = {therapy: code for code, therapy in enumerate(self.therapy_labels)}
+        self.retrieval = retrieval
+
+    @classmethod
+    def from_frame(cls, df, vectorizer, version=None):
+        symptom_matrix = normalize(vectorizer.transform(df["symptoms"].astype(str))).tocsr()
+        row_therapy, therapy_labels = pd.factorize(df["panchakarma"])
+        row_doctor, doctor_labels = pd.factorize(df["vaidya_name"])
+        therapy_rows, therapy_offsets = group_rows(row_therapy, len(therapy_labels))
+        retrieval = None
+        if symptom_matrix.shape[0] >= RETRIEVAL_MIN_ROWS:
+            # Built here, where the catalog is built; artifacts store it ready to map
+            from .retrieval import TopKIndex
+            retrieval = TopKIndex.build(symptom_matrix)
+        return cls(
+            vectorizer, symptom_matrix, therapy_labels, row_therapy,
+            doctor_labels, row_doctor, therapy_rows, therapy_offsets, version=version, retrieval=retrieval,
+        )
+
+    def doctor_names(self, therapy, top_n):
+        """The first top_n doctor names for a therapy, as df.head(top_n) would give."""
+        code = self._therapy_codes.get(therapy)
+        if code is None:
+            return ()
+        start, end = self.therapy_offsets[code], self.therapy_offsets[code + 1]
+        rows = self.therapy_rows[start:min(end, start + top_n)]
+        return tuple(self.doctor_labels[c] for c in self.row_doctor[rows])
+
+    def top_therapies(self, symptoms, k=1):
+        """
+        Score every symptom against the doctor table and return the therapies
+        of the k best rows per symptom. Small catalogs use a single sparse
+        matrix product; large ones the pruned retrieval index, which gives the
+        same rows. Ties resolve to the lowest row, matching
+        `cosine_similarity(...).argmax()`.
+        """
+        if not symptoms:
+            return []
+
+        with stage("vectorize"):
+            query = normalize(self.vectorizer.transform(symptoms))
+            query.sort_indices()
+
+        with stage("similarity"):
+            if self.retrieval is not None:
+                bounds = zip(query.indptr[:-1], query.indptr[1:])
+                top_rows = [self.retrieval.top_rows(query.indices[s:e], query.data[s:e], k) for s, e in bounds]
+            elif k == 1:
+                top_rows = (query @ self.symptom_matrix.T).toarray().argmax(axis=1)[:, None]
+            else:
+                scores = (query @ self.symptom_matrix.T).toarray()
+                top_rows = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+        return [[self.therapy_labels[c] for c in self.row_therapy[rows]] for rows in top_rows]
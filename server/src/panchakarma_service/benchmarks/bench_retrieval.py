@@ -0,0 +1,98 @@
+"""
+Scaling benchmark: top-1 therapy lookup on synthetic doctor catalogs of 10k to
+1M rows, brute-force scoring vs. the pruned inverted index (app/retrieval.py).
+Every answer is checked against brute force.
+
+Run from the service directory:
+    python -m benchmarks.bench_retrieval [--rows 10000 100000 1000000] [--terms 2000]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from app.retrieval import TopKIndex
+
+QUERIES = 300
+
+
+def term_frequencies(terms):
+    # Zipf-like: a few symptoms are everywhere, most are rare
+    freq = 1.0 / np.arange(1, terms + 1) ** 1.1
+    return freq / freq.sum()
+
+
+def synthetic_catalog(rows, terms, rng):
+    """L2-normalized TF-IDF-like rows of 2-6 symptom terms each."""
+    freq = term_frequencies(terms)
+    lengths = rng.integers(2, 7, rows)
+    cols = rng.choice(terms, size=lengths.sum(), p=freq)
+    idf = np.log(1.0 / freq) + 1.0
+    matrix = sp.csr_matrix((idf[cols], (np.repeat(np.arange(rows), lengths), cols)), shape=(rows, terms))
+    matrix.sum_duplicates()
+    return normalize(matrix).tocsr()
+
+
+def synthetic_queries(count, terms, rng):
+    """Split symptoms are short: 1-3 terms each."""
+    freq = term_frequencies(terms)
+    queries = []
+    for _ in range(count):
+        cols = np.unique(rng.choice(terms, rng.integers(1, 4), p=freq))
+        weights = rng.random(len(cols))
+        queries.append((cols, weights / np.linalg.norm(weights)))
+    return queries
+
+
+def as_matrix(queries, terms):
+    indptr = np.concatenate([[0], np.cumsum([len(cols) for cols, _ in queries])])
+    return sp.csr_matrix(
+        (np.concatenate([w for _, w in queries]), np.concatenate([c for c, _ in queries]), indptr),
+        shape=(len(queries), terms),
+    )
+
+
+def per_query_ms(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), sorted(samples)[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--terms", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>9}  {'build s':>7}  {'distinct':>8}  {'brute p50/p95 ms':>17}  {'pruned p50/p95 ms':>18}  speedup")
+    for rows in args.rows:
+        matrix = synthetic_catalog(rows, args.terms, rng)
+        queries = synthetic_queries(QUERIES, args.terms, rng)
+        query_matrix = as_matrix(queries, args.terms)
+
+        start = time.perf_counter()
+        index = TopKIndex.build(matrix)
+        build_s = time.perf_counter() - start
+
+        expected = (query_matrix @ matrix.T).toarray().argmax(axis=1)
+        got = np.array([index.top_rows(cols, weights, 1)[0] for cols, weights in queries])
+        assert (got == expected).all(), "pruned retrieval disagrees with brute force"
+
+        rows_of = {id(q): query_matrix[i] for i, q in enumerate(queries)}
+        brute = per_query_ms(lambda q: (rows_of[id(q)] @ matrix.T).toarray().argmax(), queries)
+        pruned = per_query_ms(lambda q: index.top_rows(q[0], q[1], 1), queries)
+        print(
+            f"{rows:>9,}  {build_s:>7.2f}  {len(index.vector_first_row):>8,}  "
+            f"{brute[0]:>8.3f}/{brute[1]:<8.3f}  {pruned[0]:>9.3f}/{pruned[1]:<8.3f}  {brute[0] / pruned[0]:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: per-request symptom scoring, legacy loop vs precomputed index.
+
+Run from the service directory:
+    python -m benchmarks.bench_symptom_index
+"""
+import statistics
+import time
+
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.load_data import RecommenderIndex, load_pickles
+
+df_doctor, vectorizer = load_pickles()
+index = RecommenderIndex.from_frame(df_doctor, vectorizer)
+
+REQUESTS = [
+    ["joint pain", "constipation"],
+    ["migraine", "stuffy nose", "headache"],
+    ["skin rashes", "acidity"],
+    ["cough", "asthma", "cold", "sinus"],
+    ["gout"],
+]
+
+
+def legacy(symptoms_list):
+    therapies = []
+    for symptom in symptoms_list:
+        user_vec = vectorizer.transform([symptom])
+        cosine_sim = cosine_similarity(user_vec, vectorizer.transform(df_doctor["symptoms"].astype(str))).flatten()
+        therapies.append(df_doctor.iloc[cosine_sim.argmax()]["panchakarma"])
+    return therapies
+
+
+def indexed(symptoms_list):
+    return [therapies[0] for therapies in index.top_therapies(symptoms_list, k=1)]
+
+
+def measure(fn, rounds):
+    samples = []
+    for i in range(rounds):
+        symptoms_list = REQUESTS[i % len(REQUESTS)]
+        start = time.perf_counter()
+        fn(symptoms_list)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(rounds=200):
+    for symptoms_list in REQUESTS:
+        assert legacy(symptoms_list) == indexed(symptoms_list), symptoms_list
+
+    results = {"legacy loop": measure(legacy, rounds), "symptom index": measure(indexed, rounds)}
+    for name, samples in results.items():
+        print(f"{name:>14}: mean {statistics.mean(samples):8.3f} ms   p50 {statistics.median(samples):8.3f} ms")
+
+    speedup = statistics.mean(results["legacy loop"]) / statistics.mean(results["symptom index"])
+    print(f"speedup: {speedup:.1f}x over {len(df_doctor)} doctor rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# Make the `app` package importable when pytest runs from any directory
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+
+class CountingCollection:
+    """Wraps a collection and counts the queries sent to it."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.round_trips = 0
+
+    def find(self, *args, **kwargs):
+        self.round_trips += 1
+        return self.collection.find(*args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        self.round_trips += 1
+        return self.collection.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+@pytest.fixture
+def doctor_collection():
+    """A mongomock users collection seeded with every vaidya of the catalog."""
+    from app.load_data import load_pickles
+
+    df_doctor, _ = load_pickles()
+    collection = AsyncMongoMockClient()["SIHProj"]["users"]
+    names = df_doctor["vaidya_name"].unique().tolist()
+    asyncio.run(collection.insert_many(
+        [
+            {"name": name, "role": "doctor", "email": f"doctor{i}@example.com", "password": "secret"}
+            for i, name in enumerate(names)
+        ]
+        + [{"name": names[0], "role": "patient", "email": "patient@example.com"}]
+    ))
+    return CountingCollection(collection)
+
+
+@pytest.fixture
+def doctor_store(monkeypatch, doctor_collection):
+    """A DoctorStore over `doctor_collection`, installed where the endpoints look it up."""
+    from app import main, recommender
+    from app.doctor_store import DoctorStore
+
+    store = DoctorStore(doctor_collection)
+    monkeypatch.setattr(recommender, "doctor_store", store)
+    monkeypatch.setattr(main, "doctor_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache(monkeypatch):
+    """Each test starts with an empty /recommend response cache."""
+    from app import recommender
+    from app.response_cache import ResponseCache
+
+    cache = ResponseCache()
+    monkeypatch.setattr(recommender, "response_cache", cache)
+    return cache
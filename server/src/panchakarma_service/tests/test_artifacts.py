@@ -0,0 +1,58 @@
+import mmap
+
+import numpy as np
+
+from app.artifacts import current_artifact_path, load_artifact, write_artifact
+from app.load_data import RecommenderIndex, load_pickles
+
+df_doctor, vectorizer = load_pickles()
+
+
+def is_mapped(array):
+    """True if the array is a view onto a memory-mapped file."""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+SYMPTOMS = ["joint pain", "migraine", "skin rashes", "cough and cold", "fever"]
+
+
+def test_artifact_round_trip_is_memory_mapped(tmp_path):
+    index = RecommenderIndex.from_frame(df_doctor, vectorizer)
+    path = write_artifact(index, root=str(tmp_path), version="v1")
+
+    assert current_artifact_path(str(tmp_path)) == path
+
+    mapped = load_artifact(path)
+
+    assert mapped.version == "v1"
+    assert is_mapped(mapped.row_therapy)
+    assert all(is_mapped(a) for a in (mapped.symptom_matrix.data, mapped.symptom_matrix.indices))
+    assert not mapped.symptom_matrix.data.flags.writeable
+    assert mapped.top_therapies(SYMPTOMS, k=3) == index.top_therapies(SYMPTOMS, k=3)
+    for therapy in index.therapy_labels:
+        assert mapped.doctor_names(therapy, 5) == index.doctor_names(therapy, 5)
+
+
+def test_versions_are_kept_side_by_side(tmp_path):
+    index = RecommenderIndex.from_frame(df_doctor, vectorizer)
+    first = write_artifact(index, root=str(tmp_path), version="v1")
+    write_artifact(index, root=str(tmp_path), version="v2", make_current=False)
+
+    assert current_artifact_path(str(tmp_path)) == first
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["CURRENT", "v1", "v2"]
+
+
+def test_retrieval_index_is_stored_and_memory_mapped(tmp_path, monkeypatch):
+    from app import symptom_index
+
+    monkeypatch.setattr(symptom_index, "RETRIEVAL_MIN_ROWS", 0)
+    index = RecommenderIndex.from_frame(df_doctor, vectorizer)
+    mapped = load_artifact(write_artifact(index, root=str(tmp_path), version="v1"))
+
+    assert mapped.retrieval is not None
+    assert all(is_mapped(array) for array in mapped.retrieval.arrays().values())
+    assert mapped.top_therapies(SYMPTOMS, k=3) == index.top_therapies(SYMPTOMS, k=3)
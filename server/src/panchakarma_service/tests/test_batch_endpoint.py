@@ -0,0 +1,40 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+RECORDS = [
+    {"age": 30, "gender": "Female", "symptoms": "joint pain and constipation", "severity": "often"},
+    {"age": 45, "gender": "Male", "symptoms": "headache", "severity": "sometimes"},
+    {"age": 52, "gender": "Male", "symptoms": "skin rashes, acidity", "severity": "always"},
+    {"age": 23, "gender": "Female", "symptoms": "migraine, joint pain", "severity": "often"},
+]
+
+
+@pytest.fixture
+def client(doctor_store):
+    return TestClient(main.app)
+
+
+def test_batch_matches_single_requests_in_order(client, doctor_collection):
+
+    batch = client.post("/recommend/batch", json=RECORDS).json()["results"]
+    assert doctor_collection.round_trips == 1
+    assert all(rec["doctors"] for result in batch if "recommendations" in result for rec in result["recommendations"])
+
+    singles = [client.post("/recommend", json=record).json() for record in RECORDS]
+    assert batch == singles
+
+
+def test_batch_streams_ndjson(monkeypatch, client, doctor_collection):
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 3)
+
+    response = client.post("/recommend/batch?stream=true", json=RECORDS)
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.pop("index") for line in lines] == [0, 1, 2, 3]
+    assert lines == client.post("/recommend/batch", json=RECORDS).json()["results"]
+    assert doctor_collection.round_trips == 2
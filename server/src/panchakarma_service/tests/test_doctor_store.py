@@ -0,0 +1,66 @@
+import asyncio
+
+from app import recommender
+from app.doctor_store import DoctorCache, DoctorStore
+from app.load_data import load_pickles
+
+df_doctor, _ = load_pickles()
+
+
+def test_recommend_uses_one_query_and_then_the_cache(doctor_store, doctor_collection):
+    collection = doctor_collection
+
+    async def run():
+        first = await recommender.recommend_system("joint pain, migraine and acidity", "often", top_n=5)
+        assert collection.round_trips == 1
+        second = await recommender.recommend_system("joint pain, migraine and acidity", "often", top_n=5)
+        assert collection.round_trips == 1
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    doctors = [d for rec in first["recommendations"] for d in rec["doctors"]]
+    assert doctors and all(d["email"].startswith("doctor") for d in doctors)
+    assert all(set(d) == {"doctorId", "name", "email", "phone", "address", "profile"} for d in doctors)
+
+
+def test_invalidate_forces_a_new_lookup(doctor_collection):
+    collection = doctor_collection
+    store = DoctorStore(collection)
+    name = df_doctor["vaidya_name"].iloc[0]
+
+    async def run():
+        await store.fetch([name, "Unknown Vaidya"])
+        await store.fetch([name, "Unknown Vaidya"])
+        assert collection.round_trips == 1
+        store.invalidate([name])
+        docs = await store.fetch([name, "Unknown Vaidya"])
+        assert collection.round_trips == 2
+        return docs
+
+    docs = asyncio.run(run())
+
+    assert docs["Unknown Vaidya"] is None
+    assert set(docs[name]) == {"_id", "name", "email"}
+
+
+def test_cache_expires_and_evicts():
+    now = [0.0]
+    cache = DoctorCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", {"name": "a"})
+    cache.put("b", {"name": "b"})
+    cache.get_many(["a"])
+    cache.put("c", {"name": "c"})
+
+    assert cache.get_many(["a", "b", "c"]) == ({"a": {"name": "a"}, "c": {"name": "c"}}, ["b"])
+    now[0] = 11
+    assert cache.get_many(["a"]) == ({}, ["a"])
+
+
+def test_ensure_indexes_creates_compound_index(doctor_collection):
+    collection = doctor_collection
+    asyncio.run(DoctorStore(collection).ensure_indexes())
+
+    index_info = asyncio.run(collection.index_information())
+    assert any(info["key"] == [("name", 1), ("role", 1)] for info in index_info.values())
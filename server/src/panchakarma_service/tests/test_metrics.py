@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app import main, metrics
+
+RECORD = {"age": 30, "gender": "Female", "symptoms": "joint pain and constipation", "severity": "often"}
+
+
+@pytest.fixture
+def client(doctor_store):
+    return TestClient(main.app)
+
+
+def stages(header):
+    return {entry.split(";")[0]: float(entry.split("dur=")[1]) for entry in header.split(", ")}
+
+
+def test_profile_header_returns_stage_breakdown(client):
+    response = client.post("/recommend", json=RECORD, headers={"X-Profile": "1"})
+
+    breakdown = stages(response.headers["server-timing"])
+    assert {"vectorize", "similarity", "doctor_lookup", "mongo", "response_build", "total"} <= set(breakdown)
+    assert all(ms >= 0 for ms in breakdown.values())
+
+    # Second request: doctors come from the cache, so no Mongo stage
+    response = client.post("/recommend", json=RECORD, headers={"X-Profile": "1"})
+    assert "mongo" not in stages(response.headers["server-timing"])
+
+
+def test_no_profile_without_the_header(client):
+    assert "server-timing" not in client.post("/recommend", json=RECORD).headers
+
+
+def test_metrics_endpoint_exports_prometheus_text(client):
+    client.post("/recommend", json=RECORD)
+    client.post("/recommend", json=RECORD)
+
+    text = client.get("/metrics").text
+    assert "# TYPE panchakarma_stage_seconds histogram" in text
+    assert 'panchakarma_stage_seconds_bucket{le="+Inf",stage="similarity"}' in text
+    assert 'panchakarma_cache_lookups_total{cache="doctor",result="hit"}' in text
+    assert 'panchakarma_http_requests_in_flight{path="/recommend"} 0' in text
+    assert 'panchakarma_http_request_seconds_count{method="POST",path="/recommend",status="200"}' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = CollectorRegistry()
+    histogram = metrics.Histogram("test_seconds", "Test histogram", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 5.0):
+        histogram.labels(stage="x").observe(value)
+
+    lines = generate_latest(registry).decode().splitlines()
+    assert 'test_seconds_bucket{le="0.1",stage="x"} 1.0' in lines
+    assert 'test_seconds_bucket{le="1.0",stage="x"} 2.0' in lines
+    assert 'test_seconds_bucket{le="+Inf",stage="x"} 3.0' in lines
+    assert 'test_seconds_count{stage="x"} 3.0' in lines
+
+
+def test_request_metrics_are_labelled_by_route(client):
+    client.get("/wp-login.php")
+    client.get("/.env?scan=1")
+    client.get("/recommend")  # known path, wrong method
+
+    text = client.get("/metrics").text
+    assert 'path="other"' in text
+    assert "wp-login" not in text and ".env" not in text
+    assert 'panchakarma_http_request_seconds_count{method="GET",path="/recommend",status="405"} 1' in text
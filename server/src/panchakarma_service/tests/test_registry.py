@@ -0,0 +1,82 @@
+import asyncio
+
+from app import recommender
+from app.artifacts import current_artifact_path, load_artifact, set_current, write_artifact
+from app.load_data import RecommenderIndex, load_pickles
+from app.registry import ModelRegistry
+
+df_doctor, vectorizer = load_pickles()
+
+
+def artifact_registry(root):
+    index = RecommenderIndex.from_frame(df_doctor, vectorizer)
+    write_artifact(index, root=root, version="v1")
+    write_artifact(index, root=root, version="v2", make_current=False)
+    return ModelRegistry(loader=lambda: load_artifact(current_artifact_path(root)), artifact_root=root)
+
+
+def test_reload_swaps_to_the_current_version(tmp_path):
+    registry = artifact_registry(str(tmp_path))
+    assert registry.version == "v1"
+    assert registry.pending_version() is None
+
+    set_current(str(tmp_path), "v2")
+    assert registry.pending_version() == "v2"
+
+    stats = asyncio.run(registry.reload())
+
+    assert registry.version == "v2"
+    assert stats["previous_version"] == "v1" and stats["version"] == "v2"
+    assert stats["build_ms"] >= 0
+    assert registry.status()["last_reload"] == stats
+
+
+def test_in_flight_request_finishes_on_old_version(tmp_path, monkeypatch):
+    registry = artifact_registry(str(tmp_path))
+    monkeypatch.setattr(recommender, "registry", registry)
+
+    class SlowStore:
+        def __init__(self):
+            self.entered = asyncio.Event()
+            self.release = asyncio.Event()
+
+        async def fetch(self, names):
+            self.entered.set()
+            await self.release.wait()
+            return {}
+
+    async def run():
+        store = SlowStore()
+        monkeypatch.setattr(recommender, "doctor_store", store)
+        in_flight = asyncio.create_task(recommender.recommend_system("joint pain", "often"))
+        await store.entered.wait()
+
+        set_current(str(tmp_path), "v2")
+        await registry.reload()
+        store.release.set()
+        return await in_flight, await recommender.recommend_system("joint pain", "often")
+
+    old, new = asyncio.run(run())
+
+    assert old["data_version"] == "v1"
+    assert new["data_version"] == "v2"
+
+
+def test_broken_version_keeps_current_and_is_not_retried(tmp_path):
+    root = str(tmp_path)
+    registry = artifact_registry(root)
+    with open(tmp_path / "v2" / "meta.json", "w") as f:
+        f.write("{not json")
+    set_current(root, "v2")
+
+    stats = asyncio.run(registry.reload())
+
+    assert registry.version == "v1"
+    assert stats["failed_version"] == "v2" and stats["error"]
+    assert registry.pending_version() is None
+
+    # A fixed build under a new name is picked up again
+    write_artifact(RecommenderIndex.from_frame(df_doctor, vectorizer), root=root, version="v3")
+    assert registry.pending_version() == "v3"
+    asyncio.run(registry.reload())
+    assert registry.version == "v3" and registry.failed_version is None
@@ -0,0 +1,77 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main, recommender
+from app.registry import registry
+from app.response_cache import ResponseCache
+
+RECORD = {"age": 30, "gender": "Female", "symptoms": "joint pain, migraine and acidity", "severity": "often"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reordered_symptoms_share_an_entry_and_keep_their_order(doctor_store, doctor_collection):
+    variants = ["joint pain, migraine and acidity", "ACIDITY,  Joint   Pain, migraine", "migraine, acidity, joint pain"]
+
+    async def run():
+        results = []
+        for symptoms in variants:
+            cached, _ = await recommender.recommend_cached(symptoms, "often", top_n=5)
+            results.append((cached, await recommender.recommend_system(symptoms, "often", top_n=5)))
+        return results
+
+    for cached, uncached in asyncio.run(run()):
+        assert cached == uncached
+    assert recommender.response_cache.stats()["hits"] == 2
+    assert doctor_collection.round_trips == 1
+
+
+def test_etag_answers_if_none_match_with_304(doctor_store):
+    client = TestClient(main.app)
+
+    first = client.post("/recommend", json=RECORD)
+    assert first.status_code == 200
+    assert first.headers["x-cache"] == "miss"
+    assert first.headers["cache-control"].startswith("private, max-age=")
+    etag = first.headers["etag"]
+
+    again = client.post("/recommend", json=RECORD, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag and again.headers["x-cache"] == "hit"
+
+    changed = client.post("/recommend", json={**RECORD, "symptoms": "cough"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_entries_expire_and_follow_the_data_version(monkeypatch, doctor_store):
+    clock = FakeClock()
+    monkeypatch.setattr(recommender, "response_cache", ResponseCache(ttl=60, clock=clock))
+
+    def lookup():
+        return asyncio.run(recommender.recommend_cached(RECORD["symptoms"], "often", top_n=5))[1]
+
+    assert [lookup(), lookup()] == [False, True]
+    clock.now = 61
+    assert lookup() is False
+
+    monkeypatch.setattr(registry.current, "version", "another-version")
+    assert lookup() is False
+
+
+def test_doctor_invalidation_clears_cached_responses(doctor_store):
+    client = TestClient(main.app)
+    client.post("/recommend", json=RECORD)
+    assert len(recommender.response_cache) == 1
+
+    client.post("/admin/doctors/invalidate", json={"names": None})
+
+    assert len(recommender.response_cache) == 0
+    assert client.post("/recommend", json=RECORD).headers["x-cache"] == "miss"
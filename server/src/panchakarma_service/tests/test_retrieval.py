@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from app import symptom_index
+from app.load_data import RecommenderIndex, load_pickles
+from app.retrieval import TopKIndex
+
+
+def brute_force(query, matrix, k):
+    scores = (query @ matrix.T).toarray()
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def synthetic(rows, terms, density, distinct, seed):
+    """Catalog with repeated rows and coarse weights, so exact ties are common."""
+    rng = np.random.default_rng(seed)
+    base = sp.random(distinct, terms, density=density, format="csr", random_state=seed)
+    base.data = np.round(base.data, 1)
+    base.eliminate_zeros()
+    return normalize(base[rng.integers(0, distinct, rows)]).tocsr()
+
+
+@pytest.mark.parametrize("rows, terms, density, distinct", [
+    (3000, 37, 0.08, 300),
+    (5000, 400, 0.01, 5000),
+])
+def test_matches_brute_force_exactly(rows, terms, density, distinct):
+    matrix = synthetic(rows, terms, density, distinct, seed=1)
+    queries = normalize(sp.random(150, terms, density=0.05, format="csr", random_state=2))
+    queries = sp.vstack([queries, sp.csr_matrix((1, terms))]).tocsr()  # plus an empty query
+    queries.sort_indices()
+    index = TopKIndex.build(matrix)
+
+    for k in (1, 3, 10):
+        expected = brute_force(queries, matrix, k)
+        for i in range(queries.shape[0]):
+            start, end = queries.indptr[i], queries.indptr[i + 1]
+            got = index.top_rows(queries.indices[start:end], queries.data[start:end], k)
+            assert got.tolist() == expected[i].tolist()
+
+
+def test_k_larger_than_catalog():
+    matrix = synthetic(5, 10, 0.5, 5, seed=3)
+    index = TopKIndex.build(matrix)
+    assert sorted(index.top_rows([0], [1.0], k=50).tolist()) == list(range(5))
+
+
+def test_recommender_index_uses_retrieval_above_threshold(monkeypatch):
+    df_doctor, vectorizer = load_pickles()
+    brute = RecommenderIndex.from_frame(df_doctor, vectorizer)
+    monkeypatch.setattr(symptom_index, "RETRIEVAL_MIN_ROWS", 0)
+    pruned = RecommenderIndex.from_frame(df_doctor, vectorizer)
+
+    rng = random.Random(11)
+    vocab = sorted(vectorizer.vocabulary_)
+    symptoms = [" ".join(rng.sample(vocab, rng.randint(1, 3))) for _ in range(100)] + ["fever", ""]
+
+    assert brute.retrieval is None and pruned.retrieval is not None
+    for k in (1, 3):
+        assert pruned.top_therapies(symptoms, k=k) == brute.top_therapies(symptoms, k=k)
@@ -0,0 +1,48 @@
+import random
+
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.load_data import RecommenderIndex, load_pickles
+
+df_doctor, vectorizer = load_pickles()
+index = RecommenderIndex.from_frame(df_doctor, vectorizer)
+
+
+def legacy_therapy(symptom):
+    """The original per-symptom loop from recommend_system."""
+    user_vec = vectorizer.transform([symptom])
+    cosine_sim = cosine_similarity(user_vec, vectorizer.transform(df_doctor["symptoms"].astype(str))).flatten()
+    return df_doctor.iloc[cosine_sim.argmax()]["panchakarma"]
+
+
+def test_top_therapy_matches_legacy_loop():
+    rng = random.Random(7)
+    vocab = sorted(vectorizer.vocabulary_)
+    symptoms = list(df_doctor["symptoms"].astype(str).unique()[:50])
+    symptoms += [" ".join(rng.sample(vocab, rng.randint(1, 4))) for _ in range(50)]
+    symptoms += ["fever", "", "joint pain", "SKIN rashes"]
+
+    result = index.top_therapies(symptoms, k=1)
+
+    assert [therapies[0] for therapies in result] == [legacy_therapy(s) for s in symptoms]
+
+
+def test_top_k_returns_k_therapies_per_symptom():
+    result = index.top_therapies(["migraine", "acidity"], k=3)
+
+    assert len(result) == 2
+    assert all(len(therapies) == 3 for therapies in result)
+    assert result[0][0] == legacy_therapy("migraine")
+
+
+def test_empty_symptom_list():
+    assert index.top_therapies([]) == []
+
+
+def test_doctor_names_match_dataframe_filtering():
+    for therapy in df_doctor["panchakarma"].unique():
+        for top_n in (1, 5, 10_000):
+            expected = df_doctor[df_doctor["panchakarma"] == therapy].head(top_n)["vaidya_name"].tolist()
+            assert list(index.doctor_names(therapy, top_n)) == expected
+
+    assert index.doctor_names("Unknown", 5) == ()